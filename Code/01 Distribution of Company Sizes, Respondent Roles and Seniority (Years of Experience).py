@@ -1,5 +1,7 @@
 import matplotlib.pyplot as plt
-import pandas as pd
+
+from render import is_rendered, show_figure
+from survey_data import load_survey
 
 
 # Define the color palette
@@ -9,23 +11,22 @@ bluish_palette_high_contrast = [
 ]
 
 
-# Load the Excel file
-file_path = "FinalResults.xlsx"
-xls = pd.ExcelFile(file_path)
-
-# Load the sheet into a DataFrame
-df = pd.read_excel(xls, sheet_name='Sheet1')
-df = df[df["Participated"]=="Yes"]
+# Load the survey responses (cached, already filtered to participants)
+df = load_survey(columns=["Role", "CompanySize", "YearsOfExperience"])
 
 
 # Function to create a percentage bar chart with count labels
-def create_percentage_bar_chart(data, title, xlabel, ylabel, color_palette):
-    plt.figure(figsize=(10, 6))
-
+def create_percentage_bar_chart(data, title, xlabel, ylabel, color_palette, name):
     # Calculate percentages
     value_counts = data.value_counts(normalize=True) * 100
     absolute_counts = data.value_counts()
 
+    # Skip charts already rendered from the same counts and settings
+    if is_rendered(name, absolute_counts, title=title, xlabel=xlabel, ylabel=ylabel, colors=color_palette):
+        return
+
+    plt.figure(figsize=(10, 6))
+
     ax = value_counts.plot(kind='bar', color=color_palette[:len(value_counts)])
 
     plt.title(title, fontsize=14, fontweight='bold')
@@ -41,13 +42,13 @@ def create_percentage_bar_chart(data, title, xlabel, ylabel, color_palette):
     # Adjust y-axis limit to prevent text from going out
     ax.set_ylim(0, value_counts.max() + 5)  # Adding 5% padding
 
-    plt.show()
+    show_figure(name)
 
 # Roles
-create_percentage_bar_chart(df['Role'], "Distribution of Roles", "Role", "Percentage (%)", bluish_palette_high_contrast)
+create_percentage_bar_chart(df['Role'], "Distribution of Roles", "Role", "Percentage (%)", bluish_palette_high_contrast, "01-roles")
 
 # Org Size
-create_percentage_bar_chart(df['CompanySize'], "Distribution of Company Sizes", "Company Size", "Percentage (%)", bluish_palette_high_contrast)
+create_percentage_bar_chart(df['CompanySize'], "Distribution of Company Sizes", "Company Size", "Percentage (%)", bluish_palette_high_contrast, "01-company-sizes")
 
 #  Seniority
-create_percentage_bar_chart(df['YearsOfExperience'], "Distribution of Seniority (Years of Experience)", "Years of Experience", "Percentage (%)", bluish_palette_high_contrast)
+create_percentage_bar_chart(df['YearsOfExperience'], "Distribution of Seniority (Years of Experience)", "Years of Experience", "Percentage (%)", bluish_palette_high_contrast, "01-years-of-experience")
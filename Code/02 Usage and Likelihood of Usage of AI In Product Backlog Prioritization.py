@@ -1,13 +1,10 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 
-# Load the Excel file
-file_path = "FinalResults.xlsx"
-xls = pd.ExcelFile(file_path)
+from render import is_rendered, show_figure
+from survey_data import load_survey
 
-# Load the sheet into a DataFrame
-df = pd.read_excel(xls, sheet_name='Sheet1')
-df = df[df["Participated"]=="Yes"]
+# Load the survey responses (cached, already filtered to participants)
+df = load_survey(columns=["UsedAI", "LikelihoodUseAI"])
 
 # Define the color palette
 bluish_palette_high_contrast = [
@@ -17,13 +14,17 @@ bluish_palette_high_contrast = [
 
 
 # Function to create a percentage bar chart with count labels
-def create_percentage_bar_chart(data, title, xlabel, ylabel, color_palette):
-    plt.figure(figsize=(10, 6))
-
+def create_percentage_bar_chart(data, title, xlabel, ylabel, color_palette, name):
     # Calculate percentages
     value_counts = data.value_counts(normalize=True) * 100
     absolute_counts = data.value_counts()
 
+    # Skip charts already rendered from the same counts and settings
+    if is_rendered(name, absolute_counts, title=title, xlabel=xlabel, ylabel=ylabel, colors=color_palette):
+        return
+
+    plt.figure(figsize=(10, 6))
+
     ax = value_counts.plot(kind='bar', color=color_palette[:len(value_counts)])
 
     plt.title(title, fontsize=14, fontweight='bold')
@@ -39,8 +40,8 @@ def create_percentage_bar_chart(data, title, xlabel, ylabel, color_palette):
     # Adjust y-axis limit to prevent text from going out
     ax.set_ylim(0, value_counts.max() + 5)  # Adding 5% padding
 
-    plt.show()
+    show_figure(name)
 
 # Create bar charts for AI usage and likelihood of use
-create_percentage_bar_chart(df['UsedAI'], "Usage of AI in Product Backlog Prioritization", "Usage", "Percentage (%)", bluish_palette_high_contrast)
-create_percentage_bar_chart(df['LikelihoodUseAI'], "Likelihood to Use AI in Future", "Likelihood", "Percentage (%)", bluish_palette_high_contrast)
+create_percentage_bar_chart(df['UsedAI'], "Usage of AI in Product Backlog Prioritization", "Usage", "Percentage (%)", bluish_palette_high_contrast, "02-ai-usage")
+create_percentage_bar_chart(df['LikelihoodUseAI'], "Likelihood to Use AI in Future", "Likelihood", "Percentage (%)", bluish_palette_high_contrast, "02-ai-likelihood")
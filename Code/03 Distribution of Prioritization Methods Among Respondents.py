@@ -1,6 +1,7 @@
-import pandas as pd
 import matplotlib.pyplot as plt
-import ast
+
+from cube import option_totals, survey_cube
+from render import is_rendered, show_figure
 
 # 1. DEFINE THE MISSING FUNCTION
 # This was missing in your snippet, causing the "else:" error
@@ -10,27 +11,16 @@ def shorten_method_name(method):
     #     return "Short Name"
     return method
 
-# Load the Excel file
-file_path = "FinalResults.xlsx"
-xls = pd.ExcelFile(file_path)
-
-# Load the data from the sheet
-df = pd.read_excel(xls, sheet_name="Sheet1")
-df = df[df["Participated"]=="Yes"]
-
-# Extract and count occurrences of each prioritization method
-method_counts = {}
-for methods in df["PrioritizationMethodsUsed_Split"].dropna():
-    method_list = ast.literal_eval(methods)  # Convert string representation of list to actual list
-    for method in method_list:
-        method_counts[method] = method_counts.get(method, 0) + 1
+# Count the respondents using each prioritization method (write-ins are counted as "Other")
+cube = survey_cube(dimensions=[], multiselect="PrioritizationMethodsUsed")
+method_counts = option_totals(cube).sort_values(ascending=False, kind="stable")
 
-# Sort methods by count
-sorted_methods = sorted(method_counts.items(), key=lambda x: x[1], reverse=True)
-methods, counts = zip(*sorted_methods)
+# Methods sorted by count
+method_counts = method_counts[method_counts > 0]
+methods, counts = tuple(method_counts.index), tuple(method_counts.tolist())
 
 # Calculate total number of respondents
-total_respondents = len(df)
+total_respondents = int(cube.counts.sum())
 
 # Convert counts to percentages
 percentages = [(count / total_respondents) * 100 for count in counts]
@@ -48,18 +38,20 @@ bluish_palette_high_contrast = [
 # Assign colors cyclically in case there are more bars than colors
 colors = bluish_palette_high_contrast[:len(shortened_methods)]
 
-# Create horizontal bar chart with the specified color palette
-fig, ax = plt.subplots(figsize=(20, 10))
-bars = ax.barh(shortened_methods, percentages, color=colors)
+# Skip the chart if it was already rendered from the same counts
+if not is_rendered("03-methods", method_counts, total=total_respondents, colors=colors):
+    # Create horizontal bar chart with the specified color palette
+    fig, ax = plt.subplots(figsize=(20, 10))
+    bars = ax.barh(shortened_methods, percentages, color=colors)
 
-# Add text annotations inside the bars
-for bar, count, percentage in zip(bars, counts, percentages):
-    ax.text(percentage + 1, bar.get_y() + bar.get_height()/2, f"{count} ({percentage:.1f}%)", va='center', fontsize=10)
+    # Add text annotations inside the bars
+    for bar, count, percentage in zip(bars, counts, percentages):
+        ax.text(percentage + 1, bar.get_y() + bar.get_height()/2, f"{count} ({percentage:.1f}%)", va='center', fontsize=10)
 
-ax.set_xlabel("Percentage of Respondents (%)")
-ax.set_ylabel("Prioritization Method")
-ax.set_title("Usage of Prioritization Methods Among Respondents")
-ax.set_xlim(0, max(percentages) + 5)  # Adjust x-axis limits for better spacing
-ax.invert_yaxis()  # Invert y-axis to have the most used method on top
+    ax.set_xlabel("Percentage of Respondents (%)")
+    ax.set_ylabel("Prioritization Method")
+    ax.set_title("Usage of Prioritization Methods Among Respondents")
+    ax.set_xlim(0, max(percentages) + 5)  # Adjust x-axis limits for better spacing
+    ax.invert_yaxis()  # Invert y-axis to have the most used method on top
 
-plt.show()
\ No newline at end of file
+    show_figure("03-methods")
\ No newline at end of file
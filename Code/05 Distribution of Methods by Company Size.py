@@ -2,17 +2,12 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import re
-from collections import Counter
 from matplotlib.ticker import MultipleLocator
 
-# Load data
-data_str = "FinalResults.xlsx"
-df = pd.read_excel(data_str, engine="openpyxl")
-df = df[df["Participated"]=="Yes"]
+from cube import option_table, survey_cube, table
+from multiselect import OTHER
+from render import is_rendered, show_figure
 
-# Function to split methods
-def split_methods(methods):
-    return re.split(r",\s*(?![^()]*\))", methods)
 
 # Function to categorize company sizes
 def categorize_company_size(size):
@@ -34,25 +29,21 @@ def categorize_company_size(size):
     else:
         return "over 10000"
 
-# Apply categorization
-df['CompanySizeCategory'] = df['CompanySize'].apply(categorize_company_size)
+# Method counts per company size, read from the count cube
+cube = survey_cube(dimensions=["CompanySize"], multiselect="PrioritizationMethodsUsed")
+methods_per_size = option_table(cube, 'CompanySize')
+total_per_size = table(cube, 'CompanySize')
 
-# Collect and count all methods by company size category
-methods_per_company_size = {}
-total_per_company_size = {}
-
-for company_size in df['CompanySizeCategory'].unique():
-    methods_list = df[df['CompanySizeCategory'] == company_size]['PrioritizationMethodsUsed'].dropna()
-    all_methods = []
-    total_per_company_size[company_size] = len(methods_list)
-    for methods_str in methods_list:
-        all_methods.extend(split_methods(methods_str))
-    methods_per_company_size[company_size] = Counter(all_methods)
+# Apply categorization (to the company size levels, then merge their counts);
+# the levels are in size order, so the categories are too
+size_categories = methods_per_size.index.map(categorize_company_size)
+methods_share = (methods_per_size.groupby(size_categories, sort=False).sum()
+                 .div(total_per_size.groupby(size_categories, sort=False).sum(), axis=0))
 
 # Find top 5 most common methods
 top = 5
-all_methods = sum((methods_per_company_size[size] for size in methods_per_company_size), Counter())
-top_5_methods = [m[0] for m in all_methods.most_common(top)]
+all_methods = methods_per_size.sum().drop(OTHER).sort_values(ascending=False, kind="stable")
+top_5_methods = all_methods.index[:top].tolist()
 
 # Map long method names to short names
 short_names = {
@@ -64,31 +55,30 @@ short_names = {
 }
 
 # Prepare data for chart
-method_usage_percentage = pd.DataFrame(index=['1 to 200', '201 to 1000', '1001 to 10000', 'over 10000'])
+method_usage_percentage = pd.DataFrame(index=methods_share.index)
 for method in top_5_methods:
     short_method = short_names.get(method, method)
-    method_usage_percentage[short_method] = [
-        (methods_per_company_size.get(size, {}).get(method, 0) / total_per_company_size.get(size, 1)) * 100
-        for size in ['1 to 200', '201 to 1000', '1001 to 10000', 'over 10000']
-    ]
+    method_usage_percentage[short_method] = methods_share[method].reindex(method_usage_percentage.index).fillna(0) * 100
 
 # Define bluish high-contrast palette
 bluish_palette_high_contrast = [
    "#0A0A0A", "#00A6FB", "#B2F7EF", "#D3F3FF", "#03396C"
 ]
 
-# Plot grouped bar chart
-ax = method_usage_percentage.plot(kind='bar', figsize=(12, 6), width=0.9, color=bluish_palette_high_contrast[:len(top_5_methods)])
-plt.title('Prioritization Method Usage by Company Size')
-plt.ylabel('Percentage of Users (%)')
-plt.xticks(rotation=45, ha='right')
-plt.legend(title='Methods')
-plt.tight_layout()
+# Skip the chart if it was already rendered from the same percentages
+if not is_rendered("05-methods-by-company-size", method_usage_percentage, colors=bluish_palette_high_contrast):
+    # Plot grouped bar chart
+    ax = method_usage_percentage.plot(kind='bar', figsize=(12, 6), width=0.9, color=bluish_palette_high_contrast[:len(top_5_methods)])
+    plt.title('Prioritization Method Usage by Company Size')
+    plt.ylabel('Percentage of Users (%)')
+    plt.xticks(rotation=45, ha='right')
+    plt.legend(title='Methods')
+    plt.tight_layout()
 
-# Set Y-axis with step of 5
-ax.yaxis.set_major_locator(MultipleLocator(5))
+    # Set Y-axis with step of 5
+    ax.yaxis.set_major_locator(MultipleLocator(5))
 
-for container in ax.containers:
-    ax.bar_label(container, fmt='%.1f%%', label_type='edge', padding=3)
+    for container in ax.containers:
+        ax.bar_label(container, fmt='%.1f%%', label_type='edge', padding=3)
 
-plt.show()
+    show_figure("05-methods-by-company-size")
@@ -1,14 +1,16 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import numpy as np
 import re
 #from collections import Counter
 #from matplotlib.ticker import MultipleLocator
 
-# Load data
-data_str = "FinalResults.xlsx"
-df = pd.read_excel(data_str, engine="openpyxl")
-df = df[df["Participated"]=="Yes"]
+from boxplots import box_stats, rating_matrix
+from multiselect import METHODS
+from render import is_rendered, show_figure
+from survey_data import load_survey
+
+# Load the rating columns (cached, already filtered to participants)
+df = load_survey(columns=METHODS)
 
 # Selecting only the columns related to prioritization methods
 methods_columns = [
@@ -21,16 +23,10 @@ methods_columns = [
     "Cost of Delay"
 ]
 
-# Creating a dictionary where the column names are keys and values are non-null values
-methods_dict = {
-    col: df[col].dropna().tolist() for col in methods_columns
-}
-
-# Display the resulting dictionary
-methods_dict
-
-listaVrednosti= [value for _, value in methods_dict.items()]
-listaLabela = [key for key, _ in methods_dict.items()]
+# Box-plot summaries of the methods' ratings (quartiles, whiskers, outliers), from one
+# respondents x methods array with NaN where a method was not rated
+ratings = rating_matrix(df, methods_columns)
+methods_stats = box_stats(ratings, methods_columns)
 
 import matplotlib.pyplot as plt
 
@@ -54,27 +50,31 @@ def shorten_method_name(method):
 renamed_methods = {col: shorten_method_name(col) for col in methods_columns}
 
 # Apply renaming to method labels
-listaLabela = [renamed_methods[label] for label in listaLabela]
+listaLabela = [renamed_methods[label] for label in methods_columns]
+for stats, label in zip(methods_stats, listaLabela):
+    stats["label"] = label
 
 
-# Create a prettier box plot with shortened names
-fig, ax = plt.subplots(figsize=(10, 6))
-box = ax.boxplot(methods_dict.values(), patch_artist=True, tick_labels=listaLabela)  # Use renamed labels
+# Skip the chart if it was already rendered from the same ratings
+if not is_rendered("06-method-ratings", methods_stats, colors=colors):
+    # Create a prettier box plot with shortened names
+    fig, ax = plt.subplots(figsize=(10, 6))
+    box = ax.bxp(methods_stats, patch_artist=True)  # Boxes labelled with the renamed methods
 
-# Style the box plot
-for patch, color in zip(box["boxes"], colors):
-    patch.set(facecolor=color, alpha=0.6)  # Fill box with blue shades
+    # Style the box plot
+    for patch, color in zip(box["boxes"], colors):
+        patch.set(facecolor=color, alpha=0.6)  # Fill box with blue shades
 
-# Set titles and labels
-ax.set_title("Distribution of Prioritization Method Ratings", fontsize=14, fontweight="bold")
-ax.set_xlabel("Prioritization Methods", fontsize=12)
-ax.set_ylabel("Scores", fontsize=12)
-ax.grid(True, linestyle="--", alpha=0.6)
+    # Set titles and labels
+    ax.set_title("Distribution of Prioritization Method Ratings", fontsize=14, fontweight="bold")
+    ax.set_xlabel("Prioritization Methods", fontsize=12)
+    ax.set_ylabel("Scores", fontsize=12)
+    ax.grid(True, linestyle="--", alpha=0.6)
 
-# Rotate x-axis labels for better readability
-plt.xticks(rotation=30, ha="right")
+    # Rotate x-axis labels for better readability
+    plt.xticks(rotation=30, ha="right")
 
-# Show the plot
-plt.show()
+    # Show the plot
+    show_figure("06-method-ratings")
 
 
@@ -1,11 +1,18 @@
+import colorsys
+
 import seaborn as sns
+import matplotlib.colors as mcolors
+import matplotlib.patches as mpatches
 import matplotlib.pyplot as plt
-import pandas as pd
+import numpy as np
+
+from boxplots import box_stats, rating_matrix
+from multiselect import METHODS
+from render import is_rendered, show_figure
+from survey_data import load_survey
 
-# Load data
-file_path = "FinalResults.xlsx"
-df = pd.read_excel(file_path, sheet_name="Sheet1")
-df = df[df["Participated"]=="Yes"]
+# Load AI usage and the rating columns (cached, already filtered to participants)
+df = load_survey(columns=["UsedAI"] + METHODS)
 
 # Function to categorize AI users
 def AIyes(x):
@@ -37,34 +44,39 @@ short_names = {
     "Critical Path": "Critical-Path",
 }
 
-# Convert data to long format
-df_long = df.melt(
-    id_vars=["UserOrNot"],
-    value_vars=satisfaction_columns,  # Use actual column names
-    var_name="Method",
-    value_name="Satisfaction"
-)
-
-# Rename methods using short names
-df_long["Method"] = df_long["Method"].map(short_names)
+# Box-plot summaries of every method's ratings within each user group, from one
+# respondents x methods array (NaN where a method was not rated)
+ratings = rating_matrix(df, satisfaction_columns)
+group_stats = box_stats(ratings, [short_names[col] for col in satisfaction_columns], groups=df["UserOrNot"])
 
-# Remove rows where Method is NaN (in case any are missing from the mapping)
-df_long = df_long.dropna(subset=["Method"])
+palette = {"AI User": "#011F4B", "Not AI User": "#4292c6"}
 
-# Create box plot
-plt.figure(figsize=(12, 6))
-sns.boxplot(
-    x="Method",
-    y="Satisfaction",
-    hue="UserOrNot",
-    data=df_long,
-    palette={"AI User": "#011F4B", "Not AI User": "#4292c6"},
-      medianprops={"color": "red", "alpha": 1},
-      boxprops={"alpha": 0.5}
-)
-plt.xticks(rotation=45, ha="right")
-plt.title("Satisfaction Scores by Prioritization Method: AI vs. Non-AI Users")
-plt.xlabel("Prioritization Method")
-plt.ylabel("Satisfaction Score")
-plt.legend(title="User Group", loc="upper left", bbox_to_anchor=(1, 1))
-plt.show()
+# Skip the chart if it was already rendered from the same ratings
+if not is_rendered("08-satisfaction-ai-vs-non-ai", group_stats, palette=palette):
+    # Grouped box plot in seaborn's style: boxes of the groups side by side around each method,
+    # filled with the desaturated group color and outlined in a dark gray
+    fig, ax = plt.subplots(figsize=(12, 6))
+    width = 0.8 / len(group_stats)
+    lightness = min(colorsys.rgb_to_hls(*mcolors.to_rgb(color))[1] for color in palette.values())
+    linecolor = (lightness * 0.6,) * 3
+    handles = []
+    for i, (group, stats) in enumerate(group_stats.items()):
+        color = sns.desaturate(palette[group], 0.75)
+        positions = np.arange(len(stats)) - 0.4 + width * (i + 0.5)
+        ax.bxp(stats, positions=positions, widths=width, capwidths=width / 2, patch_artist=True,
+               manage_ticks=False,
+               boxprops={"facecolor": color, "edgecolor": linecolor, "alpha": 0.5},
+               medianprops={"color": "red", "alpha": 1, "solid_capstyle": "butt"},
+               whiskerprops={"color": linecolor, "solid_capstyle": "butt"},
+               capprops={"color": linecolor},
+               flierprops={"markeredgecolor": linecolor, "markersize": 5})
+        handles.append(mpatches.Patch(facecolor=color, edgecolor=linecolor, alpha=0.5, label=group))
+    labels = [box["label"] for box in next(iter(group_stats.values()))]
+    ax.set_xticks(np.arange(len(labels)), labels)
+    ax.set_xlim(-0.5, len(labels) - 0.5)
+    plt.xticks(rotation=45, ha="right")
+    plt.title("Satisfaction Scores by Prioritization Method: AI vs. Non-AI Users")
+    plt.xlabel("Prioritization Method")
+    plt.ylabel("Satisfaction Score")
+    plt.legend(handles=handles, title="User Group", loc="upper left", bbox_to_anchor=(1, 1))
+    show_figure("08-satisfaction-ai-vs-non-ai")
@@ -1,18 +1,23 @@
 import pandas as pd
-import numpy as np
-from scipy import stats
+
+from bootstrap import bootstrap, cramers_v
+from cube import survey_cube, table
+from multiselect import load_indicators
+from results import cached_grid
+from summary_stats import chi2_test
+from survey_data import load_survey
 
 
 # 1. LOAD DATA
 
-df = pd.read_csv('FinalResults.csv')
-df = df[df["Participated"]=="Yes"]
+# Cached, already filtered to participants
+df = load_survey(columns=['Seniority', 'CompanySize'])
 
 # 2. CONFIGURATION
 methods_map = {
-    'MoSCoW': 'MoSCoW',
-    'RICE': 'RICE',
-    'WSJF': 'WSJF',
+    'MoSCoW': 'MoSCoW (Must-have, Should-have, Could-have, Won’t-have)',
+    'RICE': 'RICE (Reach, Impact, Confidence, Effort)',
+    'WSJF': 'WSJF (Weighted Shortest Job First)',
     'Value vs. Effort': 'Value vs. Effort Matrix',
     'Kano Model': 'Kano Model',
     'Eisenhower Matrix': 'Eisenhower Matrix',
@@ -22,101 +27,82 @@ methods_map = {
     'Critical Path': 'Critical Path'
 }
 
-results = []
 demographics = [('Seniority Level', 'Seniority'), ('Company Size', 'CompanySize')]
 
-# --- HELPER FUNCTIONS ---
+# Bootstrap settings (see bootstrap.py)
+n_boot = 1000
+ci_method = 'percentile'  # or 'bca'
+ci_precision = None  # e.g. 0.005: resample until the CI endpoints are this stable
 
-def calculate_cramers_v(ct):
-    n = ct.sum().sum()
-    min_dim = min(ct.shape) - 1
-    if min_dim <= 0:
-        return 0.0
-    chi2 = stats.chi2_contingency(ct)[0]
-    return np.sqrt(chi2 / (n * min_dim))
-
-def bootstrap_cramers_v(series1, series2, n_boots=1000):
-    
-    # Create a clean dataframe for these two columns
-    data = pd.DataFrame({'d': series1, 'm': series2}).dropna()
-    n = len(data)
-    
-    if n == 0:
-        return 0.0, 0.0, 0.0
-
-    # 1. Point Estimate
-    ct_orig = pd.crosstab(data['d'], data['m'])
-    v_point = calculate_cramers_v(ct_orig)
-
-    # 2. Bootstrap Distribution
-    boot_vals = []
-    values = data.values  # Convert to numpy for slightly better speed
-    
-    for _ in range(n_boots):
-        # Resample with replacement
-        indices = np.random.randint(0, n, n)
-        sample = values[indices]
-        
-        # Create temp Crosstab
-        # Note: We use pandas crosstab to ensure handling of categorical alignment
-        ct_boot = pd.crosstab(sample[:, 0], sample[:, 1])
-        
-        v_boot = calculate_cramers_v(ct_boot)
-        boot_vals.append(v_boot)
-    
-    # 3. Percentiles (95% CI)
-    ci_low = np.percentile(boot_vals, 2.5)
-    ci_high = np.percentile(boot_vals, 97.5)
-    
-    return v_point, ci_low, ci_high
-
-# 3. RUN TESTS
+# Create Binary Usage Columns (from the decoded multi-select answers, so short
+# names are never matched inside other answers)
+methods_used = load_indicators(df, 'PrioritizationMethodsUsed')
 for m_short, m_long in methods_map.items():
-    # Create Binary Usage Column
-    df[f'{m_short}_Used'] = df['PrioritizationMethodsUsed'].fillna('').apply(lambda x: m_long in x)
-    
-    for demo_name, demo_col in demographics:
-        # Prepare Data
-        demo_series = df[demo_col]
-        usage_series = df[f'{m_short}_Used']
-        
-        # Calculate Stats & CI
-        v, ci_low, ci_high = bootstrap_cramers_v(demo_series, usage_series, n_boots=1000)
-        
-        # Run standard Chi2 for p-value
-        ct = pd.crosstab(demo_series, usage_series)
-        chi2, p, dof, _ = stats.chi2_contingency(ct)
-        min_dim = min(ct.shape) - 1
-        
-        # Determine Significance Stars
-        sig = 'ns'
-        if p < 0.001: sig = '***'
-        elif p < 0.01: sig = '**'
-        elif p < 0.05: sig = '*'
-        
-        results.append({
-            'Method': m_short,
-            'Demographic Factor': demo_name,
-            'χ²': f"{chi2:.2f}",
-            'df': dof,
-            'Effect Size (V)': f"{v:.2f}",
-            '95% CI': f"[{ci_low:.2f}, {ci_high:.2f}]", # NEW COLUMN
-            'df*': min_dim,
-            'P-Value': p,
-            'Sig.': sig
-        })
-
-# 4. FORMAT & EXPORT
-res_df = pd.DataFrame(results)
-
-# Sort
-res_df = res_df.sort_values(by=['Method', 'Demographic Factor'])
-
-# Format P-Value
-res_df['P-Value'] = res_df['P-Value'].apply(lambda x: "< .001" if x < 0.001 else f"{x:.3f}")
-
-# EXPORT
-output_filename = 'Appendix_A_Table A1.csv'
-res_df.to_csv(output_filename, index=False)
-
-print(res_df[['Method', 'Demographic Factor', 'Effect Size (V)', '95% CI', 'Sig.']].head().to_markdown(index=False))
+    df[f'{m_short}_Used'] = methods_used[m_long]
+
+# Demographic x method usage counts for the chi-square tests
+cube = survey_cube(dimensions=[demo_col for _, demo_col in demographics], multiselect="PrioritizationMethodsUsed")
+
+# Cramér's V and its bootstrap CI, over all resamples at once (bootstrap.cramers_v)
+
+def run_cell(cell, seed):
+    """Chi-square test and Cramér's V (with bootstrap CI) for one method x demographic cell."""
+    m_short, demo_name, demo_col = cell
+
+    # Prepare Data
+    demo_series = df[demo_col]
+    usage_series = df[f'{m_short}_Used']
+
+    # Calculate Stats & CI
+    temp_df = pd.DataFrame({'d': demo_series, 'm': usage_series}).dropna()
+    boot = bootstrap(cramers_v(temp_df['d'], temp_df['m']), len(temp_df), n_boot=n_boot, rng=seed, method=ci_method,
+                     precision=ci_precision)
+    ci_low, ci_high = boot.ci_low, boot.ci_high
+
+    # Run standard Chi2 for p-value and V (from the contingency table of the count cube)
+    ct = table(cube, demo_col, methods_map[m_short])
+    chi2, p, dof, v, _ = chi2_test(ct)
+    min_dim = min(ct.shape) - 1
+
+    # Determine Significance Stars
+    sig = 'ns'
+    if p < 0.001: sig = '***'
+    elif p < 0.01: sig = '**'
+    elif p < 0.05: sig = '*'
+
+    return {
+        'Method': m_short,
+        'Demographic Factor': demo_name,
+        'χ²': f"{chi2:.2f}",
+        'df': dof,
+        'Effect Size (V)': f"{v:.2f}",
+        '95% CI': f"[{ci_low:.2f}, {ci_high:.2f}]", # NEW COLUMN
+        'Resamples': boot.n_valid,
+        'MC Error': f"{boot.mc_error:.4f}",
+        'df*': min_dim,
+        'P-Value': p,
+        'Sig.': sig
+    }
+
+
+if __name__ == "__main__":
+    # 3. RUN TESTS (cells in parallel, each with its own child seed; cells already in the
+    # results store for the same data and settings are read back instead)
+    cells = [(m_short, demo_name, demo_col) for m_short in methods_map for demo_name, demo_col in demographics]
+    results = cached_grid('A1', run_cell, cells, seed=42, inputs=df, n_boot=n_boot, ci_method=ci_method,
+                          ci_precision=ci_precision)
+
+    # 4. FORMAT & EXPORT
+    res_df = pd.DataFrame(results)
+
+    # Sort
+    res_df = res_df.sort_values(by=['Method', 'Demographic Factor'])
+
+    # Format P-Value
+    res_df['P-Value'] = res_df['P-Value'].apply(lambda x: "< .001" if x < 0.001 else f"{x:.3f}")
+
+    # EXPORT
+    output_filename = 'Appendix_A_Table A1.csv'
+    res_df.to_csv(output_filename, index=False)
+
+    print(res_df[['Method', 'Demographic Factor', 'Effect Size (V)', '95% CI', 'Sig.']].head().to_markdown(index=False))
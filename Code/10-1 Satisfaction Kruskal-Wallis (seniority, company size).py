@@ -1,10 +1,16 @@
 import pandas as pd
-import numpy as np
-from scipy import stats
+
+from bootstrap import bootstrap, epsilon_squared
+from cube import rating_table, survey_cube
+from multiselect import METHODS
+from posthoc import dunn_grid, pairs_finding
+from results import cached_grid
+from summary_stats import kruskal_test, mean_scores
+from survey_data import load_survey
 
 # 1. LOAD DATA
-df = pd.read_csv('FinalResults.csv')
-df = df[df["Participated"]=="Yes"]
+# Cached, already filtered to participants
+df = load_survey(columns=['Seniority', 'CompanySize', *METHODS])
 
 # 2. CONFIGURATION
 sat_cols_map = {
@@ -21,101 +27,92 @@ sat_cols_map = {
 }
 df.rename(columns=sat_cols_map, inplace=True)
 
-results = []
 demographics = [('Seniority Level', 'Seniority'), ('Company Size', 'CompanySize')]
 
-def calculate_epsilon_squared(H, n):
-    """
-    Calculates Epsilon-squared for Kruskal-Wallis.
-    Formula: H / ((n^2 - 1) / (n + 1))
-    """
-    if n <= 1: return 0
-    return H / ((n**2 - 1) / (n + 1))
+# Multiple-comparison correction of the post-hoc tests over the whole grid ('holm' or 'bh')
+posthoc_correction = 'holm'
 
-def bootstrap_epsilon_ci(df_subset, group_col, val_col, n_boot=1000, seed=42):
-    """
-    Bootstraps the CI for Epsilon-squared using stratified resampling.
-    """
-    np.random.seed(seed)
-    boot_es = []
-    
-    # Group data for stratified resampling
-    groups_dict = {g: df_subset[df_subset[group_col] == g] for g in df_subset[group_col].unique()}
+# Bootstrap settings (see bootstrap.py)
+n_boot = 1000
+ci_method = 'percentile'  # or 'bca'
+ci_precision = None  # e.g. 0.005: resample until the CI endpoints are this stable
+
+# Rating histograms (demographic x 1-5 counts) of every method, for the Kruskal-Wallis tests
+# (the stored cube counts the export's columns; its ratings are looked up by short name)
+cube = survey_cube(dimensions=[demo_col for _, demo_col in demographics], ratings=list(sat_cols_map))
+cube = cube._replace(rated=list(sat_cols_map.values()))
+
+def run_cell(cell, seed):
+    """Kruskal-Wallis test and epsilon-squared (with bootstrap CI) for one method x demographic cell."""
+    method, demo_name, demo_col = cell
+    temp_df = df[[demo_col, method]].dropna()
+    ratings = rating_table(cube, demo_col, method)
     
-    for _ in range(n_boot):
-        # Stratified resampling: sample each group with replacement
-        resampled_parts = []
-        for g, data in groups_dict.items():
-            resampled_parts.append(data.sample(n=len(data), replace=True))
+    if (ratings.sum(axis=1) > 0).sum() < 2: return None
         
-        resampled = pd.concat(resampled_parts)
-        
-        # Prepare groups for Kruskal-Wallis
-        r_groups = [resampled[resampled[group_col]==g][val_col] for g in resampled[group_col].unique()]
-        r_groups = [g for g in r_groups if len(g) > 0]
+    # Standard Kruskal-Wallis Test (from the rating histograms)
+    kw = kruskal_test(ratings)
+    stat, p = kw.h, kw.p
+    
+    # Effect Size (Epsilon-squared, H / ((n^2 - 1) / (n + 1)))
+    n_total = kw.n
+    epsilon_sq = kw.epsilon_squared
+    
+    # Calculate Bootstrap CI (95%)
+    # (stratified resampling, batched Kruskal-Wallis over all resamples)
+    boot = bootstrap(epsilon_squared(temp_df[demo_col], temp_df[method]), n_total,
+                     n_boot=n_boot, strata=temp_df[demo_col], rng=seed, method=ci_method,
+                     precision=ci_precision)
+    ci_lower, ci_upper = boot.ci_low, boot.ci_high
+    
+    sig = 'ns'
+    if p < 0.001: sig = '***'
+    elif p < 0.01: sig = '**'
+    elif p < 0.05: sig = '*'
+    
+    finding = "-"
+    if p < 0.05:
+        means = mean_scores(ratings).sort_values(ascending=False)
+        finding = f"Highest: {means.index[0]} ({means.iloc[0]:.2f})"
         
-        if len(r_groups) < 2:
-            continue
-            
-        try:
-            h_stat, _ = stats.kruskal(*r_groups)
-            n_total = len(resampled)
-            es = calculate_epsilon_squared(h_stat, n_total)
-            boot_es.append(es)
-        except ValueError:
-            continue
+    return {
+        'Method (Satisfaction)': method,
+        'Demographic Factor': demo_name,
+        'Test Statistic (H)': f"{stat:.2f}",
+        'df': kw.dof,
+        'P-Value': p,
+        'Sig.': sig,
+        'Epsilon-squared': f"{epsilon_sq:.3f}",
+        '95% CI': f"[{ci_lower:.3f}, {ci_upper:.3f}]",
+        'Resamples': boot.n_valid,
+        'MC Error': f"{boot.mc_error:.4f}",
+        'Finding': finding
+    }
 
-    if not boot_es:
-        return np.nan, np.nan
 
-    return np.percentile(boot_es, 2.5), np.percentile(boot_es, 97.5)
+if __name__ == "__main__":
+    # 3. RUN TESTS (cells in parallel, each with its own child seed; cells already in the
+    # results store for the same data and settings are read back instead)
+    cells = [(method, demo_name, demo_col) for method in sat_cols_map.values() for demo_name, demo_col in demographics]
+    results = [row for row in cached_grid('A2', run_cell, cells, seed=42, inputs=df, n_boot=n_boot,
+                                          ci_method=ci_method, ci_precision=ci_precision) if row is not None]
 
-# 3. RUN TESTS
-for method in sat_cols_map.values():
-    for demo_name, demo_col in demographics:
-        temp_df = df[[demo_col, method]].dropna()
-        groups = [temp_df[temp_df[demo_col]==g][method] for g in temp_df[demo_col].unique()]
-        groups = [g for g in groups if len(g) > 0]
-        
-        if len(groups) < 2: continue
-            
-        # Standard Kruskal-Wallis Test
-        stat, p = stats.kruskal(*groups)
-        
-        # Calculate Effect Size (Epsilon-squared)
-        n_total = len(temp_df)
-        epsilon_sq = calculate_epsilon_squared(stat, n_total)
-        
-        # Calculate Bootstrap CI (95%)
-        ci_lower, ci_upper = bootstrap_epsilon_ci(temp_df, demo_col, method)
-        
-        sig = 'ns'
-        if p < 0.001: sig = '***'
-        elif p < 0.01: sig = '**'
-        elif p < 0.05: sig = '*'
-        
-        finding = "-"
-        if p < 0.05:
-            means = temp_df.groupby(demo_col)[method].mean().sort_values(ascending=False)
-            finding = f"Highest: {means.index[0]} ({means.iloc[0]:.2f})"
-            
-        results.append({
-            'Method (Satisfaction)': method,
-            'Demographic Factor': demo_name,
-            'Test Statistic (H)': f"{stat:.2f}",
-            'df': len(groups) - 1,
-            'P-Value': p,
-            'Sig.': sig,
-            'Epsilon-squared': f"{epsilon_sq:.3f}",
-            '95% CI': f"[{ci_lower:.3f}, {ci_upper:.3f}]",
-            'Finding': finding
-        })
+    # 4. FORMAT & EXPORT
+    res_df = pd.DataFrame(results)
+    res_df = res_df.sort_values(by=['Method (Satisfaction)', 'Demographic Factor'])
 
-# 4. FORMAT & EXPORT
-res_df = pd.DataFrame(results)
-res_df = res_df.sort_values(by=['Method (Satisfaction)', 'Demographic Factor'])
+    # 5. POST-HOC: Dunn's test of every pair of groups in the significant cells, from the same
+    # rating histograms, with the p-values of all pairs corrected together
+    demo_cols = dict(demographics)
+    significant = res_df[res_df['P-Value'] < 0.05]
+    histograms = {(method, demo_name): rating_table(cube, demo_cols[demo_name], method)
+                  for method, demo_name in zip(significant['Method (Satisfaction)'], significant['Demographic Factor'])}
+    pairs = dunn_grid(histograms, posthoc_correction, cell_columns=['Method (Satisfaction)', 'Demographic Factor'])
+    res_df['Post-hoc (Dunn)'] = [pairs_finding(pairs, cell) if cell in histograms else "-"
+                                 for cell in zip(res_df['Method (Satisfaction)'], res_df['Demographic Factor'])]
+    pairs.drop(columns='cell').to_csv('Appendix_A_Table A2 post-hoc.csv', index=False)
 
-print("Analysis Complete. First 5 rows:")
-print(res_df.head())
+    print("Analysis Complete. First 5 rows:")
+    print(res_df.head())
 
-res_df.to_csv('Appendix_A_Table A2', index=False)
+    res_df.to_csv('Appendix_A_Table A2.csv', index=False)
@@ -1,10 +1,16 @@
 import pandas as pd
-import numpy as np
-from scipy import stats
+
+from bootstrap import bootstrap, epsilon_squared
+from cube import rating_table, survey_cube
+from multiselect import METHODS
+from posthoc import dunn_grid, pairs_finding
+from results import cached_grid
+from summary_stats import kruskal_test, mean_scores
+from survey_data import load_survey
 
 # 1. LOAD DATA
-df = pd.read_csv('FinalResults.csv')
-df = df[df["Participated"]=="Yes"]
+# Cached, already filtered to participants
+df = load_survey(columns=['UsedAI', 'AIUsage', *METHODS])
 
 # 2. CONFIGURATION
 sat_cols_map = {
@@ -21,86 +27,98 @@ sat_cols_map = {
 }
 df.rename(columns=sat_cols_map, inplace=True)
 
-results = []
 demographics = [('AI Usage Frequency', 'UsedAI'), ('AI User vs Non-User', 'AIUsage')]
 
-# Bootstrap settings
+# Multiple-comparison correction of the post-hoc tests over the whole grid ('holm' or 'bh')
+posthoc_correction = 'holm'
+
+# Rating histograms (demographic x 1-5 counts) of every method, for the Kruskal-Wallis tests
+# (the stored cube counts the export's columns; its ratings are looked up by short name)
+cube = survey_cube(dimensions=[demo_col for _, demo_col in demographics], ratings=list(sat_cols_map))
+cube = cube._replace(rated=list(sat_cols_map.values()))
+
+# Bootstrap settings (see bootstrap.py)
 n_boot = 1000 
-rng = np.random.default_rng(42)
+seed = 42
+ci_method = 'percentile'  # or 'bca'
+ci_precision = None  # e.g. 0.005: resample until the CI endpoints are this stable
 
-# 3. RUN TESTS
-for method in sat_cols_map.values():
-    for demo_name, demo_col in demographics:
-        if demo_col not in df.columns:
-            continue
-            
-        temp_df = df[[demo_col, method]].dropna()
-        n = len(temp_df)
-        
-        unique_vals = temp_df[demo_col].unique()
-        groups = [temp_df[temp_df[demo_col]==g][method] for g in unique_vals]
-        groups = [g for g in groups if len(g) > 0]
-        
-        if len(groups) < 2: 
-            continue
-            
-        stat, p = stats.kruskal(*groups)
-        
-        # Effect Size (Epsilon-squared)
-        epsilon2 = stat * (n + 1) / (n**2 - 1)
-        
-        # Bootstrap
-        boot_vals = []
-        for _ in range(n_boot):
-            resamp = temp_df.sample(n=n, replace=True)
-            bgroups = [resamp[resamp[demo_col]==g][method] for g in resamp[demo_col].unique()]
-            bgroups = [g for g in bgroups if len(g) > 0]
-            if len(bgroups) < 2:
-                continue
-            try:
-                bstat, _ = stats.kruskal(*bgroups)
-                b_eps = bstat * (n + 1) / (n**2 - 1)
-                boot_vals.append(b_eps)
-            except ValueError:
-                pass
+def run_cell(cell, seed):
+    """Kruskal-Wallis test and epsilon-squared (with bootstrap CI) for one method x demographic cell."""
+    method, demo_name, demo_col = cell
+    temp_df = df[[demo_col, method]].dropna()
+    ratings = rating_table(cube, demo_col, method)
+    
+    if (ratings.sum(axis=1) > 0).sum() < 2: 
+        return None
         
-        # Format CI as single string
-        ci_str = "-"
-        if len(boot_vals) > 0:
-            ci_lower = np.percentile(boot_vals, 2.5)
-            ci_upper = np.percentile(boot_vals, 97.5)
-            ci_str = f"[{ci_lower:.3f}, {ci_upper:.3f}]"
+    # Kruskal-Wallis test from the rating histograms
+    kw = kruskal_test(ratings)
+    stat, p, n = kw.h, kw.p, kw.n
+    
+    # Effect Size (Epsilon-squared)
+    epsilon2 = kw.epsilon_squared
+    
+    # Bootstrap (unstratified resampling, batched Kruskal-Wallis over all resamples)
+    boot = bootstrap(epsilon_squared(temp_df[demo_col], temp_df[method]), n, n_boot=n_boot, rng=seed, method=ci_method,
+                     precision=ci_precision)
+    
+    # Format CI as single string
+    ci_str = "-"
+    if boot.n_valid > 0:
+        ci_str = f"[{boot.ci_low:.3f}, {boot.ci_high:.3f}]"
+    
+    sig = 'ns'
+    if p < 0.001: sig = '***'
+    elif p < 0.01: sig = '**'
+    elif p < 0.05: sig = '*'
+    
+    finding = "-"
+    if p < 0.05:
+        means = mean_scores(ratings).sort_values(ascending=False)
+        finding = f"Highest: {means.index[0]} ({means.iloc[0]:.2f})"
         
-        sig = 'ns'
-        if p < 0.001: sig = '***'
-        elif p < 0.01: sig = '**'
-        elif p < 0.05: sig = '*'
+    return {
+        'Method (Satisfaction)': method,
+        'Demographic Factor': demo_name,
+        'Test Statistic (H)': f"{stat:.2f}",
+        'df': kw.dof,
+        'P-Value': p,
+        'Sig.': sig,
+        'Effect Size (eps^2)': epsilon2,
+        '95% CI': ci_str,
+        'Resamples': boot.n_valid,
+        'MC Error': f"{boot.mc_error:.4f}",
+        'Finding': finding
+    }
+
+
+if __name__ == "__main__":
+    # 3. RUN TESTS (cells in parallel, each with its own child seed; cells already in the
+    # results store for the same data and settings are read back instead)
+    cells = [(method, demo_name, demo_col) for method in sat_cols_map.values() for demo_name, demo_col in demographics]
+    results = [row for row in cached_grid('A3', run_cell, cells, seed=seed, inputs=df, n_boot=n_boot,
+                                          ci_method=ci_method, ci_precision=ci_precision) if row is not None]
+
+    # 4. FORMAT & EXPORT
+    res_df = pd.DataFrame(results)
+    if not res_df.empty:
+        res_df = res_df.sort_values(by=['Method (Satisfaction)', 'Demographic Factor'])
         
-        finding = "-"
-        if p < 0.05:
-            means = temp_df.groupby(demo_col)[method].mean().sort_values(ascending=False)
-            finding = f"Highest: {means.index[0]} ({means.iloc[0]:.2f})"
-            
-        results.append({
-            'Method (Satisfaction)': method,
-            'Demographic Factor': demo_name,
-            'Test Statistic (H)': f"{stat:.2f}",
-            'df': len(groups) - 1,
-            'P-Value': p,
-            'Sig.': sig,
-            'Effect Size (eps^2)': epsilon2,
-            '95% CI': ci_str,
-            'Finding': finding
-        })
+        # Post-hoc: Dunn's test of every pair of groups in the significant cells, from the same
+        # rating histograms, with the p-values of all pairs corrected together
+        demo_cols = dict(demographics)
+        significant = res_df[res_df['P-Value'] < 0.05]
+        histograms = {(method, demo_name): rating_table(cube, demo_cols[demo_name], method)
+                      for method, demo_name in zip(significant['Method (Satisfaction)'], significant['Demographic Factor'])}
+        pairs = dunn_grid(histograms, posthoc_correction, cell_columns=['Method (Satisfaction)', 'Demographic Factor'])
+        res_df['Post-hoc (Dunn)'] = [pairs_finding(pairs, cell) if cell in histograms else "-"
+                                     for cell in zip(res_df['Method (Satisfaction)'], res_df['Demographic Factor'])]
+        pairs.drop(columns='cell').to_csv('Appendix_A_Table A3 post-hoc.csv', index=False)
 
-# 4. FORMAT & EXPORT
-res_df = pd.DataFrame(results)
-if not res_df.empty:
-    res_df = res_df.sort_values(by=['Method (Satisfaction)', 'Demographic Factor'])
-    
-    # Format float columns
-    res_df['Effect Size (eps^2)'] = res_df['Effect Size (eps^2)'].map('{:.3f}'.format)
-    
-    output_filename = 'Appendix_A_Table A3.csv'
-    res_df.to_csv(output_filename, index=False)
-    print(res_df.head().to_markdown(index=False))
+        # Format float columns
+        res_df['Effect Size (eps^2)'] = res_df['Effect Size (eps^2)'].map('{:.3f}'.format)
+        
+        output_filename = 'Appendix_A_Table A3.csv'
+        res_df.to_csv(output_filename, index=False)
+        print(res_df.head().to_markdown(index=False))
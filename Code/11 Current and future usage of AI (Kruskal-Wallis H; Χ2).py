@@ -1,87 +1,71 @@
 import pandas as pd
 import numpy as np
-from scipy import stats
+
+from bootstrap import bootstrap, cramers_v, epsilon_squared_unbiased
+from cube import survey_cube, table
+from posthoc import dunn_grid, pairs_finding
+from results import cached_grid
+from schema import ordinal
+from summary_stats import chi2_test, kruskal_test, mean_scores
+from survey_data import load_survey
 
 # 1. LOAD DATA
-df = pd.read_csv('FinalResults.csv')
-df = df[df["Participated"] == "Yes"]
+# Cached, already filtered to participants
+df = load_survey(columns=['Seniority', 'CompanySize', 'UsedAI', 'LikelihoodUseAI'])
+
+# Ordinal likelihood score, 1 (Very unlikely) to 5 (Very likely)
+df['Future_AI_Score'] = ordinal(df['LikelihoodUseAI'])
 
-likelihood_map = {
-    'Very unlikely': 1, 'Somewhat unlikely': 2, 'Neutral': 3,
-    'Somewhat likely': 4, 'Very likely': 5
-}
-df['Future_AI_Score'] = df['LikelihoodUseAI'].map(likelihood_map)
+# Demographic x AI usage / likelihood counts for the chi-square and Kruskal-Wallis tests
+cube = survey_cube(dimensions=['Seniority', 'CompanySize', 'UsedAI', 'LikelihoodUseAI'])
 
 # ---------------------------------------------------------
 # HELPER FUNCTIONS
 # ---------------------------------------------------------
 
-def cramers_v(x, y):
-    """Calculates Cramér's V for two categorical series."""
-    confusion_matrix = pd.crosstab(x, y)
-    if confusion_matrix.size == 0: return 0
-    chi2 = stats.chi2_contingency(confusion_matrix)[0]
-    n = confusion_matrix.sum().sum()
-    if n == 0: return 0
-    r, k = confusion_matrix.shape
-    return np.sqrt((chi2 / n) / min(k - 1, r - 1))
-
-def epsilon_squared(x, y):
-    """Calculates Epsilon-squared for Kruskal-Wallis."""
-    # x: categorical group, y: numeric score
-    groups = [y[x == g] for g in x.unique()]
-    if len(groups) < 2: return 0
-    H, _ = stats.kruskal(*groups)
-    n = len(y)
-    k = len(groups)
-    # Unbiased Epsilon-squared formula
-    if n == k: return 0
-    return (H - k + 1) / (n - k)
-
-def bootstrap_ci(df_subset, col_group, col_target, metric_func, n_boot=1000, ci=0.95):
+def bootstrap_ci(df_subset, col_group, col_target, metric, n_boot=1000, ci=0.95, rng=None, method='percentile',
+                 precision=None):
     """
-    Calculates bootstrapped confidence interval for a given metric.
-    Uses stratified resampling to preserve group sizes.
+    Calculates bootstrapped confidence interval for a batched metric from bootstrap.py.
+    Uses stratified resampling to preserve group sizes; method is 'percentile' or 'bca', and
+    precision (optional) makes the number of resamples adaptive (see bootstrap.bootstrap).
+    Returns (point estimate, CI string, number of valid resamples, Monte Carlo error of the CI).
     """
-    values = []
-    for _ in range(n_boot):
-        try:
-            # Stratified resampling: sample from each group with replacement
-            sample = df_subset.groupby(col_group, group_keys=False).apply(lambda x: x.sample(n=len(x), replace=True))
-            val = metric_func(sample[col_group], sample[col_target])
-            values.append(val)
-        except Exception:
-            pass # Skip failed iterations (e.g., if a group vanishes, though stratified prevents this)
-            
-    if not values:
-        return "N/A"
-        
-    lower = np.percentile(values, (1 - ci) / 2 * 100)
-    upper = np.percentile(values, (1 + ci) / 2 * 100)
-    return f"[{lower:.2f}, {upper:.2f}]"
+    boot = bootstrap(metric(df_subset[col_group], df_subset[col_target]), len(df_subset),
+                     n_boot=n_boot, ci=ci, strata=df_subset[col_group], rng=rng, method=method, precision=precision)
+    if boot.n_valid == 0:
+        return boot.estimate, "N/A", 0, np.nan
+    return boot.estimate, f"[{boot.ci_low:.2f}, {boot.ci_high:.2f}]", boot.n_valid, boot.mc_error
 
 # ---------------------------------------------------------
 # ANALYSIS
 # ---------------------------------------------------------
 
-results = []
 demographics = [('Seniority Level', 'Seniority'), ('Company Size', 'CompanySize')]
 
+# Multiple-comparison correction of the post-hoc tests over the whole grid ('holm' or 'bh')
+posthoc_correction = 'holm'
+
+# Bootstrap settings (see bootstrap.py)
+n_boot = 1000
+ci_method = 'percentile'  # or 'bca'
+ci_precision = None  # e.g. 0.005: resample until the CI endpoints are this stable
+
 # A. Current AI Usage (Chi-Squared)
-for demo_name, demo_col in demographics:
+def usage_cell(demo_name, demo_col, seed):
     temp_df = df[[demo_col, 'UsedAI']].dropna()
-    ct = pd.crosstab(temp_df[demo_col], temp_df['UsedAI'])
+    ct = table(cube, demo_col, 'UsedAI')
     
-    chi2, p, dof, _ = stats.chi2_contingency(ct)
-    stat_val = cramers_v(temp_df[demo_col], temp_df['UsedAI'])
-    ci_str = bootstrap_ci(temp_df, demo_col, 'UsedAI', cramers_v)
+    chi2, p, dof, stat_val, _ = chi2_test(ct)
+    _, ci_str, n_valid, mc_error = bootstrap_ci(temp_df, demo_col, 'UsedAI', cramers_v, n_boot=n_boot, rng=seed,
+                                                method=ci_method, precision=ci_precision)
     
     sig = 'ns'
     if p < 0.001: sig = '***'
     elif p < 0.01: sig = '**'
     elif p < 0.05: sig = '*'
     
-    results.append({
+    return {
         'Survey Question': 'Current AI Usage (Last 12 Months)',
         'Demographic Factor': demo_name,
         'Test Statistic': f"X2={chi2:.2f}",
@@ -90,25 +74,34 @@ for demo_name, demo_col in demographics:
         'Sig.': sig,
         'Effect Size': f"V={stat_val:.2f}",
         'Effect Size CI (95%)': ci_str,
+        'Resamples': n_valid,
+        'MC Error': f"{mc_error:.4f}",
         'Key Finding': "Sig. usage patterns" if p < 0.05 else "No diff"
-    })
+    }
 
 # B. Future Likelihood (Kruskal-Wallis)
-for demo_name, demo_col in demographics:
+def likelihood_scores(demo_col):
+    """Demographic x likelihood score counts; the answers are in score order."""
+    scores = table(cube, demo_col, 'LikelihoodUseAI')
+    scores.columns = np.arange(1, len(scores.columns) + 1)
+    return scores
+
+def likelihood_cell(demo_name, demo_col, seed):
     temp_df = df[[demo_col, 'Future_AI_Score']].dropna()
-    groups = [temp_df[temp_df[demo_col]==g]['Future_AI_Score'] for g in temp_df[demo_col].unique()]
+    scores = likelihood_scores(demo_col)
     
-    if len(groups) < 2: continue
+    if (scores.sum(axis=1) > 0).sum() < 2: return None
         
-    stat, p = stats.kruskal(*groups)
+    kw = kruskal_test(scores)
+    stat, p = kw.h, kw.p
     
     # Calculate actual effect size
-    n = len(temp_df)
-    k = len(groups)
-    est_val = (stat - k + 1) / (n - k)
+    k = kw.k
+    est_val = kw.epsilon_squared_unbiased
     
     # Calculate CI
-    ci_str = bootstrap_ci(temp_df, demo_col, 'Future_AI_Score', epsilon_squared)
+    _, ci_str, n_valid, mc_error = bootstrap_ci(temp_df, demo_col, 'Future_AI_Score', epsilon_squared_unbiased,
+                                                n_boot=n_boot, rng=seed, method=ci_method, precision=ci_precision)
 
     sig = 'ns'
     if p < 0.001: sig = '***'
@@ -117,10 +110,10 @@ for demo_name, demo_col in demographics:
     
     finding = "No diff"
     if p < 0.05:
-        means = temp_df.groupby(demo_col)['Future_AI_Score'].mean().sort_values(ascending=False)
+        means = mean_scores(scores).sort_values(ascending=False)
         finding = f"Highest: {means.index[0]} ({means.iloc[0]:.2f})"
 
-    results.append({
+    return {
         'Survey Question': 'Future AI Likelihood',
         'Demographic Factor': demo_name,
         'Test Statistic': f"H={stat:.2f}",
@@ -129,10 +122,38 @@ for demo_name, demo_col in demographics:
         'Sig.': sig,
         'Effect Size': f"ε²={est_val:.2f}",
         'Effect Size CI (95%)': ci_str,
+        'Resamples': n_valid,
+        'MC Error': f"{mc_error:.4f}",
         'Key Finding': finding
-    })
+    }
+
+question_cells = {'usage': usage_cell, 'likelihood': likelihood_cell}
+
+def run_cell(cell, seed):
+    """Runs one question x demographic cell of the grid."""
+    question, demo_name, demo_col = cell
+    return question_cells[question](demo_name, demo_col, seed)
+
+
+if __name__ == "__main__":
+    # Run both questions for every demographic (in parallel, each cell with its own child seed;
+    # cells already in the results store for the same data and settings are read back instead)
+    cells = [(question, demo_name, demo_col) for question in question_cells for demo_name, demo_col in demographics]
+    results = [row for row in cached_grid('A4', run_cell, cells, seed=42, inputs=df, n_boot=n_boot,
+                                          ci_method=ci_method, ci_precision=ci_precision) if row is not None]
+
+    # Save Results
+    results_df = pd.DataFrame(results)
 
-# Save Results
-results_df = pd.DataFrame(results)
-print(results_df)
-results_df.to_csv('Appendix_A_Table A4.csv', index=False)
+    # Post-hoc: Dunn's test of every pair of groups where the likelihood differs significantly,
+    # with the p-values of all pairs corrected together
+    demo_cols = dict(demographics)
+    significant = results_df[(results_df['Survey Question'] == 'Future AI Likelihood') & (results_df['P-Value'] < 0.05)]
+    histograms = {demo_name: likelihood_scores(demo_cols[demo_name]) for demo_name in significant['Demographic Factor']}
+    pairs = dunn_grid(histograms, posthoc_correction)
+    results_df['Post-hoc (Dunn)'] = [
+        pairs_finding(pairs, demo_name) if question == 'Future AI Likelihood' and demo_name in histograms else "-"
+        for question, demo_name in zip(results_df['Survey Question'], results_df['Demographic Factor'])]
+    pairs.rename(columns={'cell': 'Demographic Factor'}).to_csv('Appendix_A_Table A4 post-hoc.csv', index=False)
+    print(results_df)
+    results_df.to_csv('Appendix_A_Table A4.csv', index=False)
@@ -0,0 +1,110 @@
+import pandas as pd
+import numpy as np
+import matplotlib.pyplot as plt
+import seaborn as sns
+
+from multiselect import load_indicators
+from render import is_rendered, show_figure
+from summary_stats import association_matrix
+from survey_data import load_survey
+
+
+# 1. LOAD DATA
+
+# Cached, already filtered to participants
+demographics = {
+    'Role': 'Role',
+    'CompanySize': 'Company Size',
+    'Seniority': 'Seniority',
+    'YearsOfExperience': 'Years of Experience',
+    'UsedAI': 'Used AI',
+    'LikelihoodUseAI': 'Likelihood of AI Use'
+}
+df = load_survey(columns=list(demographics))
+
+# 2. CONFIGURATION
+methods_map = {
+    'MoSCoW (Must-have, Should-have, Could-have, Won’t-have)': 'MoSCoW',
+    'RICE (Reach, Impact, Confidence, Effort)': 'RICE',
+    'WSJF (Weighted Shortest Job First)': 'WSJF',
+    'Value vs. Effort Matrix': 'Value vs. Effort',
+    'Kano Model': 'Kano Model',
+    'Eisenhower Matrix': 'Eisenhower Matrix',
+    'Cost of Delay': 'Cost of Delay',
+    'Opportunity Scoring': 'Opportunity Scoring',
+    'Custom Formula': 'Custom Formula',
+    'Critical Path': 'Critical Path',
+    'Other': 'Other Method'
+}
+
+encouragements_map = {
+    'Faster decision-making': 'Faster Decisions',
+    'Integration with existing tools (JIRA, Asana, etc.)': 'Tool Integration',
+    'Improved accuracy in prioritization': 'Improved Accuracy',
+    'Reduction of biases in prioritization': 'Less Bias',
+    'Positive case studies or success stories': 'Case Studies',
+    'Regulatory compliance or security assurances': 'Compliance',
+    'Other': 'Other Encouragement'
+}
+
+# Every variable of the map: the demographics, one used / not used indicator per method
+# and one selected / not selected indicator per encouragement (from the decoded answers)
+methods_used = load_indicators(df, 'PrioritizationMethodsUsed').rename(columns=lambda m: f"Uses {methods_map[m]}")
+encouraged = load_indicators(df, 'Encouragement').rename(columns=lambda e: f"Encouraged by {encouragements_map[e]}")
+variables = pd.concat([df.rename(columns=demographics), methods_used, encouraged], axis=1)
+
+# Chi-square test and Cramér's V of every pair of variables, all from one one-hot design
+# matrix (summary_stats.association_matrix) instead of a crosstab per pair
+pairs = association_matrix(variables)
+
+
+if __name__ == "__main__":
+    # 3. FORMAT & EXPORT
+    res_df = pd.DataFrame({
+        'Variable A': pairs['a'],
+        'Variable B': pairs['b'],
+        'χ²': pairs['chi2'].map('{:.2f}'.format),
+        'df': pairs['dof'],
+        'Effect Size (V)': pairs['v'].map('{:.2f}'.format),
+        'N': pairs['n'],
+        'P-Value': pairs['p'].apply(lambda x: "< .001" if x < 0.001 else f"{x:.3f}"),
+        'Sig.': pd.cut(pairs['p'], [-np.inf, 0.001, 0.01, 0.05, np.inf], labels=['***', '**', '*', 'ns'], right=False)
+    })
+
+    output_filename = 'Appendix_A_Table A5.csv'
+    res_df.to_csv(output_filename, index=False)
+
+    print(res_df.sort_values('Effect Size (V)', ascending=False).head().to_markdown(index=False))
+
+    # 4. HEATMAP (lower triangle: Cramér's V, significant pairs starred)
+    names = list(variables.columns)
+    v_matrix = pd.DataFrame(np.eye(len(names)), index=names, columns=names)
+    labels = pd.DataFrame("", index=names, columns=names)
+    for a, b, v, sig in zip(pairs['a'], pairs['b'], pairs['v'], res_df['Sig.']):
+        v_matrix.loc[a, b] = v_matrix.loc[b, a] = v
+        labels.loc[a, b] = labels.loc[b, a] = f"{v:.2f}\n{sig}" if sig != 'ns' else f"{v:.2f}"
+
+    # Skip the chart if it was already rendered from the same statistics
+    if not is_rendered("12-association-map", v_matrix, labels=labels):
+        fig, ax = plt.subplots(figsize=(18, 15))
+        sns.heatmap(
+            v_matrix,
+            mask=np.triu(np.ones(v_matrix.shape, dtype=bool)),
+            annot=labels,
+            fmt="",
+            annot_kws={"fontsize": 6},
+            cmap="Blues",
+            vmin=0,
+            vmax=1,
+            linewidths=0.5,
+            cbar_kws={"label": "Cramér's V"},
+            ax=ax
+        )
+
+        plt.title("Associations Between Demographics, Methods Used and AI Encouragements (Cramér's V)", fontsize=16, pad=20)
+        plt.xticks(rotation=90, fontsize=9)
+        plt.yticks(fontsize=9)
+        plt.tight_layout()
+
+        # Show the plot
+        show_figure("12-association-map")
@@ -0,0 +1,161 @@
+"""
+Times every analysis on synthetic exports of growing size (see synthetic.py).
+
+    python Code/benchmark.py                                  # 10^3 - 10^5 rows, every analysis
+    python Code/benchmark.py --sizes 1000000 10000000 --analyses ingest counts fig03
+
+Each analysis runs in a fresh process with the export's Parquet cache already built
+(except "ingest", which parses the CSV and builds the cache), and its wall time, CPU time
+and peak memory are appended to benchmarks/results.csv together with the commit and host,
+next to the previous result of the same analysis and size. Exports are kept in
+benchmarks/data/ and reused by later runs.
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from pipeline import ANALYSES, NODES
+from profiling import peak_rss_mb
+from render import CODE_DIR
+
+
+BENCH_DIR = os.path.join(CODE_DIR, "..", "benchmarks")
+RESULTS = os.path.join(BENCH_DIR, "results.csv")
+SIZES = [1_000, 10_000, 100_000]
+
+
+def _ingest(out_dir):
+    from multiselect import load_indicators
+    from survey_data import load_survey
+    for path in glob.glob(".FinalResults.*"):
+        os.remove(path)
+    df = load_survey()
+    load_indicators(df, "PrioritizationMethodsUsed")
+    load_indicators(df, "Encouragement")
+
+
+def _counts(out_dir):
+    # The aggregates behind the charts: decoded selections and every demographic breakdown
+    from cube import DIMENSIONS, build_cube, option_table, table
+    from multiselect import load_indicators, option_counts
+    from survey_data import load_survey
+    df = load_survey()
+    indicators = load_indicators(df, "PrioritizationMethodsUsed")
+    option_counts(indicators)
+    cube = build_cube(df, indicators)
+    for dim in DIMENSIONS:
+        table(cube, dim)
+        option_table(cube, dim)
+
+
+def _stream(out_dir):
+    # The same counts plus the rating histograms, from the CSV in bounded chunks
+    from cube import stream_cube
+    from multiselect import METHODS
+    stream_cube("FinalResults.csv", ratings=METHODS)
+
+
+def _script(name):
+    from render import render_script
+    return lambda out_dir: render_script(NODES[name].script, out_dir)
+
+
+TASKS = {"ingest": _ingest, "counts": _counts, "stream": _stream, **{name: _script(name) for name in ANALYSES}}
+
+
+def _measure(task, data_dir, workers):
+    # Runs in a fresh worker process, so nothing is memoized from an earlier task
+    os.chdir(data_dir)
+    os.environ["SURVEY_WORKERS"] = str(workers)
+    with tempfile.TemporaryDirectory() as out_dir:
+        wall, cpu = time.perf_counter(), time.process_time()
+        TASKS[task](out_dir)
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    return {"wall_s": wall, "cpu_s": cpu, "peak_rss_mb": peak_rss_mb()}
+
+
+def run_task(task, data_dir, workers=1):
+    """Times one analysis on the export in data_dir in a new process."""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(_measure, task, data_dir, workers).result()
+
+
+def synthetic_export(n, seed=0):
+    """Folder holding a synthetic FinalResults.csv of n rows, written on first use."""
+    from synthetic import write_export
+
+    data_dir = os.path.abspath(os.path.join(BENCH_DIR, "data", f"n{n}-seed{seed}"))
+    path = os.path.join(data_dir, "FinalResults.csv")
+    if not os.path.exists(path):
+        # Written under another name first, so an interrupted run leaves no partial export
+        partial = os.path.join(data_dir, "partial.csv")
+        write_export(partial, n, seed)
+        os.replace(partial, path)
+    return data_dir
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=CODE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(sizes=SIZES, analyses=None, seed=0, workers=1, results=RESULTS):
+    """
+    Times the analyses (all by default) at every size and appends the results to the
+    results file. Returns this run's results with the previous time of each analysis
+    and size on the same host, and the ratio to it.
+    """
+    analyses = list(TASKS) if analyses is None else analyses
+    unknown = set(analyses) - set(TASKS)
+    if unknown:
+        raise KeyError(f"Unknown analyses {sorted(unknown)}; choose from {', '.join(TASKS)}")
+    run = {"run": pd.Timestamp.now().isoformat(timespec="seconds"), "commit": _commit(),
+           "host": platform.node(), "python": platform.python_version(), "workers": workers}
+
+    rows = []
+    for n in sizes:
+        data_dir = synthetic_export(n, seed)
+        # "ingest" also builds the cache every other analysis reads
+        ingest = run_task("ingest", data_dir, workers)
+        for task in analyses:
+            timing = ingest if task == "ingest" else run_task(task, data_dir, workers)
+            rows.append({**run, "rows": n, "analysis": task, **timing})
+            print(f"{n:>10} {task:8} {timing['wall_s']:9.2f}s")
+
+    current = pd.DataFrame(rows)
+    previous = pd.read_csv(results) if os.path.exists(results) else current.iloc[:0]
+    os.makedirs(os.path.dirname(results), exist_ok=True)
+    current.to_csv(results, mode="a", header=not os.path.exists(results), index=False)
+
+    last = (previous[previous["host"] == run["host"]]
+            .drop_duplicates(["rows", "analysis"], keep="last")
+            .set_index(["rows", "analysis"])["wall_s"].rename("previous_wall_s"))
+    current = current.join(last, on=["rows", "analysis"])
+    current["ratio"] = current["wall_s"] / current["previous_wall_s"]
+    return current
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the analyses on synthetic data.")
+    parser.add_argument("--sizes", nargs="+", type=int, default=SIZES, help="rows per export (default: 10^3 - 10^5)")
+    parser.add_argument("--analyses", nargs="+", default=None, choices=list(TASKS), help="default: all")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="workers of the bootstrap grids (default: 1)")
+    parser.add_argument("--results", default=RESULTS, help="CSV the results are appended to")
+    args = parser.parse_args()
+
+    results = run_benchmark(args.sizes, args.analyses, args.seed, args.workers, args.results)
+    print(results[["rows", "analysis", "wall_s", "cpu_s", "peak_rss_mb", "previous_wall_s", "ratio"]]
+          .to_string(index=False, float_format="{:.2f}".format))
@@ -0,0 +1,337 @@
+"""
+Bootstrap CIs of the appendix tables' effect sizes (Cramér's V, epsilon-squared).
+
+A statistic is batched: it takes a (B, n) matrix of resampled row indices and returns B
+values, computed from the B resampled count tables at once (contingency tables for V,
+group x rating histograms for epsilon-squared) instead of one table per resample.
+bootstrap() draws the resamples, within strata if given, and returns the CI:
+
+- percentile intervals, or BCa (method="bca"), which corrects for the upward bias of V and
+  epsilon-squared near zero. Its jackknife is taken from the count tables too (leaving one
+  respondent out changes one cell), so it costs about one more batch of resamples;
+- the Monte Carlo error of the CI endpoints, i.e. how much they would move with other
+  resamples. With precision, resamples are added in rounds of ROUND_BOOT until both
+  endpoints are that stable (at most max_boot), instead of a fixed n_boot.
+
+The counting kernels run compiled from kernels.py when Numba is installed.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+import kernels
+from profiling import stage
+
+
+# Result of bootstrap(): the statistic on the original sample, the CI, how many of the
+# n_boot resamples drawn gave a usable value, and the Monte Carlo standard error of the
+# CI endpoints (the larger of the two), i.e. how much they would move with other resamples.
+BootstrapResult = namedtuple("BootstrapResult", ["estimate", "ci_low", "ci_high", "n_valid", "n_boot", "mc_error"])
+
+# Resamples bootstrap() adds per round while it works towards a requested precision
+ROUND_BOOT = 250
+
+# Intervals bootstrap() can report: plain percentiles of the resamples, or bias-corrected
+# and accelerated ones, which hold their coverage for skewed statistics bounded at zero
+CI_METHODS = ["percentile", "bca"]
+
+# Index-matrix entries evaluated at once by bootstrap(); resamples of large samples are
+# drawn in batches of this many rows, so memory stays flat as n grows.
+BATCH_CELLS = 2 ** 22
+
+
+def encode(series):
+    """Integer-codes a series once; returns (codes, levels)."""
+    codes, levels = pd.factorize(series, sort=True)
+    return codes.astype(np.intp), levels
+
+
+def strata_layout(strata):
+    """
+    Precomputes where each stratum's rows are, for draw_indices().
+    Returns (order, start, size): rows sorted by stratum, and for every position in that
+    order the start and size of the stratum it belongs to.
+    """
+    codes, _ = encode(strata)
+    order = np.argsort(codes, kind="stable")
+    sizes = np.bincount(codes)
+    starts = np.cumsum(sizes) - sizes
+    return order, np.repeat(starts, sizes), np.repeat(sizes, sizes)
+
+
+def draw_indices(n, n_boot, rng=None, strata=None):
+    """
+    All bootstrap resamples as one (n_boot, n) matrix of row indices, drawn in a single call.
+    strata is an optional strata_layout(); each stratum is then resampled within itself,
+    so group sizes are the same in every resample.
+    """
+    rng = np.random.default_rng(rng)
+    if strata is None:
+        return rng.integers(0, n, size=(n_boot, n))
+    order, start, size = strata
+    return order[start + rng.integers(0, size, size=(n_boot, n))]
+
+
+def contingency_tables(x, y, idx, r, c):
+    """
+    Builds every resample's r x c contingency table at once.
+    x, y are integer codes, idx is an (B, n) index matrix; returns a (B, r, c) count array.
+    """
+    if kernels.backend == "numba":
+        return kernels.resample_counts(x, y, idx, r, c)
+    B = idx.shape[0]
+    cells = x[idx] * c + y[idx] + (np.arange(B) * (r * c))[:, None]
+    return np.bincount(cells.ravel(), minlength=B * r * c).reshape(B, r, c)
+
+
+def chi2_tables(tables):
+    """
+    Pearson chi-square of a (B, r, c) stack of tables, as stats.chi2_contingency computes it.
+    Rows/columns that are empty in a resample are left out (pd.crosstab would not create them),
+    and Yates' correction is applied where the remaining table is 2 x 2.
+    Returns (chi2, min_dim) arrays, min_dim being min(rows, columns) - 1 of the remaining table.
+    """
+    if kernels.backend == "numba":
+        return kernels.chi2_tables(np.asarray(tables, dtype=float))
+    tables = tables.astype(float)
+    rows = tables.sum(axis=2)
+    cols = tables.sum(axis=1)
+    n = rows.sum(axis=1)
+    r_eff = (rows > 0).sum(axis=1)
+    c_eff = (cols > 0).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = rows[:, :, None] * cols[:, None, :] / n[:, None, None]
+        diff = tables - expected
+        yates = ((r_eff - 1) * (c_eff - 1) == 1)[:, None, None]
+        diff = np.where(yates, np.sign(diff) * np.maximum(np.abs(diff) - 0.5, 0), diff)
+        terms = np.where(expected > 0, diff ** 2 / expected, 0.0)
+    chi2 = terms.sum(axis=(1, 2))
+    return chi2, np.minimum(r_eff, c_eff) - 1
+
+
+def cramers_v_tables(tables):
+    """Cramér's V of a (B, r, c) stack of tables; 0 where a table has a single row or column."""
+    chi2, min_dim = chi2_tables(tables)
+    n = tables.sum(axis=(1, 2))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        v = np.sqrt(chi2 / (n * min_dim))
+    return np.where(min_dim > 0, v, 0.0)
+
+
+def rank_sums(counts):
+    """
+    Rank sums of a (B, k, u) stack of group x value count tables, values in ascending order:
+    the mid-ranks follow from how often each value occurs. Returns (rank sums (B, k), group
+    sizes (B, k), value counts (B, u)), which give H (kruskal_counts()) and the post-hoc tests.
+    """
+    counts = np.asarray(counts, dtype=float)
+    ties = counts.sum(axis=1)
+    midranks = np.cumsum(ties, axis=1) - (ties - 1) / 2
+    return (counts * midranks[:, None, :]).sum(axis=2), counts.sum(axis=2), ties
+
+
+def kruskal_counts(counts):
+    """
+    Kruskal-Wallis H (tie-corrected, as stats.kruskal) of a (B, k, u) stack of group x value
+    count tables, values in ascending order (see rank_sums()).
+    Returns (H, n_groups) arrays; H is NaN where fewer than two groups are present or all values tie.
+    """
+    if kernels.backend == "numba":
+        return kernels.kruskal_counts(np.asarray(counts, dtype=float))
+    sums, sizes, ties = rank_sums(counts)
+    n = ties.sum(axis=1)
+    n_groups = (sizes > 0).sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        h = 12 / (n * (n + 1)) * np.where(sizes > 0, sums ** 2 / sizes, 0).sum(axis=1) - 3 * (n + 1)
+        h = h / (1 - (ties ** 3 - ties).sum(axis=1) / (n ** 3 - n))
+    h[(n_groups < 2) | ~np.isfinite(h)] = np.nan
+    return h, n_groups
+
+
+def kruskal_h(groups, values, idx, k=None):
+    """
+    Kruskal-Wallis H of every resample in an (B, n) index matrix (see kruskal_counts()).
+    groups and values are integer codes, values coded in ascending order (see encode()).
+    """
+    k = groups.max() + 1 if k is None else k
+    with stage("bootstrap.rank_counts", rows=idx.size):
+        counts = contingency_tables(groups, values, idx, k, values.max() + 1)
+    return kruskal_counts(counts)
+
+
+def leave_one_out_tables(a, b, r, c):
+    """
+    The r x c count table of integer codes a, b without each row, for the jackknife: leaving
+    a row out only lowers its own cell by one, so there is one table per distinct (a, b) pair.
+    Returns (tables (m, r, c), the table of every row).
+    """
+    cells = a * c + b
+    pairs, inverse = np.unique(cells, return_inverse=True)
+    tables = np.repeat(np.bincount(cells, minlength=r * c).reshape(1, r, c), len(pairs), axis=0)
+    tables[np.arange(len(pairs)), pairs // c, pairs % c] -= 1
+    return tables, inverse
+
+
+def jackknife(statistic, n):
+    """
+    The statistic on each of the n leave-one-out samples. The statistics below compute these
+    from leave_one_out_tables() (statistic.jackknife); any other is evaluated on leave-one-out
+    index matrices, in batches of BATCH_CELLS entries.
+    """
+    if hasattr(statistic, "jackknife"):
+        return statistic.jackknife()
+    batch = max(1, BATCH_CELLS // max(n - 1, 1))
+    positions = np.arange(n - 1)
+    return np.concatenate([statistic(positions + (positions >= np.arange(first, min(first + batch, n))[:, None]))
+                           for first in range(0, n, batch)])
+
+
+# Statistics for bootstrap(): each takes an (B, n) index matrix and returns B values,
+# NaN where a resample is unusable, and offers its leave-one-out values as .jackknife().
+
+def cramers_v(x, y):
+    """Cramér's V between two categorical series."""
+    x, x_levels = encode(x)
+    y, y_levels = encode(y)
+
+    def statistic(idx):
+        with stage("bootstrap.tables", rows=idx.size):
+            tables = contingency_tables(x, y, idx, len(x_levels), len(y_levels))
+        with stage("bootstrap.chi2", resamples=len(tables)):
+            return cramers_v_tables(tables)
+
+    def leave_one_out():
+        tables, inverse = leave_one_out_tables(x, y, len(x_levels), len(y_levels))
+        return cramers_v_tables(tables)[inverse]
+    statistic.jackknife = leave_one_out
+    return statistic
+
+
+def epsilon_squared(groups, values):
+    """Kruskal-Wallis epsilon-squared, H / ((n^2 - 1) / (n + 1))."""
+    groups, group_levels = encode(groups)
+    values, value_levels = encode(values)
+    n = len(groups)
+
+    def statistic(idx):
+        h, _ = kruskal_h(groups, values, idx, len(group_levels))
+        m = idx.shape[1]
+        return h / ((m ** 2 - 1) / (m + 1))
+
+    def leave_one_out():
+        tables, inverse = leave_one_out_tables(groups, values, len(group_levels), len(value_levels))
+        h, _ = kruskal_counts(tables)
+        m = n - 1
+        return (h / ((m ** 2 - 1) / (m + 1)))[inverse]
+    statistic.jackknife = leave_one_out
+    return statistic
+
+
+def epsilon_squared_unbiased(groups, values):
+    """Unbiased Kruskal-Wallis epsilon-squared, (H - k + 1) / (n - k); 0 when n == k."""
+    groups, group_levels = encode(groups)
+    values, value_levels = encode(values)
+    n = len(groups)
+
+    def statistic(idx):
+        h, k = kruskal_h(groups, values, idx, len(group_levels))
+        m = idx.shape[1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(m == k, 0.0, (h - k + 1) / (m - k))
+
+    def leave_one_out():
+        tables, inverse = leave_one_out_tables(groups, values, len(group_levels), len(value_levels))
+        h, k = kruskal_counts(tables)
+        m = n - 1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(m == k, 0.0, (h - k + 1) / (m - k))[inverse]
+    statistic.jackknife = leave_one_out
+    return statistic
+
+
+def bca_percentiles(values, estimate, jackknife_values, ci=0.95):
+    """
+    Percentiles (0-100) of the bootstrap values that bound the bias-corrected and accelerated
+    interval: the bias correction from the share of resamples below the estimate, the
+    acceleration from the skewness of the jackknife values.
+    """
+    # Ties with the estimate count half, and the share stays inside (0, 1)
+    below = (np.mean(values < estimate) + np.mean(values <= estimate)) / 2
+    below = np.clip(below, 0.5 / len(values), 1 - 0.5 / len(values))
+    z0 = stats.norm.ppf(below)
+    jackknife_values = jackknife_values[~np.isnan(jackknife_values)]
+    d = jackknife_values.mean() - jackknife_values if len(jackknife_values) else np.zeros(1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        a = (d ** 3).sum() / (6 * ((d ** 2).sum()) ** 1.5)
+    a = a if np.isfinite(a) else 0.0
+    z = z0 + stats.norm.ppf([(1 - ci) / 2, (1 + ci) / 2])
+    return stats.norm.cdf(z0 + z / (1 - a * z)) * 100
+
+
+def quantile_mc_error(values, percentiles):
+    """
+    Monte Carlo standard error of percentiles (0-100) of bootstrap values, from the
+    distribution-free 95% interval of each quantile: the order statistics at
+    p -+ 1.96 * sqrt(p (1 - p) / B), whose distance is about 2 * 1.96 standard errors.
+    """
+    p = np.asarray(percentiles, dtype=float) / 100
+    half = 1.96 * np.sqrt(p * (1 - p) / len(values))
+    low = np.percentile(values, np.clip(p - half, 0, 1) * 100)
+    high = np.percentile(values, np.clip(p + half, 0, 1) * 100)
+    return (high - low) / (2 * 1.96)
+
+
+def _resample(statistic, n, n_boot, rng, layout):
+    # The statistic on n_boot resamples, drawn in batches of BATCH_CELLS index entries
+    batch = max(1, BATCH_CELLS // n)
+    return np.concatenate([statistic(draw_indices(n, min(batch, n_boot - done), rng, layout))
+                           for done in range(0, n_boot, batch)])
+
+
+def bootstrap(statistic, n, n_boot=1000, ci=0.95, strata=None, rng=None, method="percentile",
+              precision=None, max_boot=10_000):
+    """
+    Bootstrap CI of a batched statistic over n rows: percentile, or BCa with method="bca"
+    (its acceleration from jackknife(), which costs about one more batch of resamples).
+    strata (optional) are the group labels to resample within. The resamples are drawn
+    and evaluated together (in batches of BATCH_CELLS index entries for large n);
+    NaN values are left out and counted in n_valid.
+    With precision, n_boot is replaced by an adaptive count: resamples are added in rounds
+    of ROUND_BOOT until the Monte Carlo error of both endpoints is at most precision
+    (e.g. 0.005 for stable two-decimal CIs), or max_boot resamples were drawn.
+    """
+    if method not in CI_METHODS:
+        raise ValueError(f"Unknown CI method '{method}'; choose from {', '.join(CI_METHODS)}")
+    with stage("bootstrap", rows=n, method=method, precision=precision) as record:
+        estimate = statistic(np.arange(n)[None, :])[0]
+        layout = strata_layout(strata) if strata is not None else None
+        rng = np.random.default_rng(rng)
+        jackknife_values = jackknife(statistic, n) if method == "bca" and not np.isnan(estimate) else None
+
+        def interval(values):
+            # Percentiles bounding the CI, and their Monte Carlo error
+            percentiles = [(1 - ci) / 2 * 100, (1 + ci) / 2 * 100]
+            if method == "bca":
+                percentiles = bca_percentiles(values, estimate, jackknife_values, ci)
+            return percentiles, quantile_mc_error(values, percentiles).max()
+
+        drawn = n_boot if precision is None else 2 * ROUND_BOOT
+        values = _resample(statistic, n, drawn, rng, layout)
+        while precision is not None and drawn < max_boot:
+            valid = values[~np.isnan(values)]
+            if len(valid) and interval(valid)[1] <= precision:
+                break
+            step = min(ROUND_BOOT, max_boot - drawn)
+            values = np.concatenate([values, _resample(statistic, n, step, rng, layout)])
+            drawn += step
+        values = values[~np.isnan(values)]
+        record.update(resamples=drawn, valid=len(values))
+        if len(values) == 0 or (method == "bca" and np.isnan(estimate)):
+            return BootstrapResult(estimate, np.nan, np.nan, len(values), drawn, np.nan)
+        percentiles, mc_error = interval(values)
+        record["mc_error"] = mc_error
+    ci_low, ci_high = np.percentile(values, percentiles)
+    return BootstrapResult(estimate, ci_low, ci_high, len(values), drawn, mc_error)
@@ -0,0 +1,88 @@
+"""
+Box-plot summaries of the satisfaction ratings, computed from one dense array instead of
+per-column lists, so the charts draw precomputed boxes (Axes.bxp()) whatever the number
+of respondents.
+"""
+import numpy as np
+import pandas as pd
+
+
+def rating_matrix(df, columns):
+    """The ratings in columns as one respondents x columns float32 array, NaN where not rated."""
+    return df[list(columns)].to_numpy(dtype=np.float32, na_value=np.nan)
+
+
+def _block_sums(values, start, end):
+    # Column sums of every block of rows start[g]:end[g] (zero for empty blocks)
+    cumulative = np.concatenate([np.zeros((1, values.shape[1])), np.cumsum(values, axis=0, dtype=float)])
+    return cumulative[end] - cumulative[start]
+
+
+def _at(values, rows):
+    # values[rows[g, j], j] for every group g and column j (NaN where there is no such row)
+    inside = (rows >= 0) & (rows < len(values))
+    picked = values[np.where(inside, rows, 0), np.arange(values.shape[1])] if len(values) else np.zeros(rows.shape)
+    return np.where(inside, picked, np.nan)
+
+
+def _quantile(values, start, n, q):
+    # Linear-interpolation quantile (as np.percentile) of the n[g, j] sorted ratings of column j
+    # starting at row start[g]; NaN where a group rated nothing
+    position = start[:, None] + q * np.maximum(n - 1, 0)
+    below = np.floor(position).astype(np.intp)
+    low, high = _at(values, below).astype(float), _at(values, np.ceil(position).astype(np.intp)).astype(float)
+    return np.where(n > 0, low + (high - low) * (position - below), np.nan)
+
+
+def box_stats(matrix, labels, groups=None, whis=1.5):
+    """
+    Box-plot statistics of every column of a respondents x columns matrix (NaN = missing),
+    as matplotlib.cbook.boxplot_stats() computes them: a list of Axes.bxp() dicts, one per
+    column, labelled with labels. With a group label per row (e.g. AI User / Non-AI User),
+    a dict {group: list} in the order the groups first appear; rows without a group are
+    left out. Every group is sorted once, all columns together. Fliers are reported once per
+    distinct value, so drawing them does not grow with the respondents.
+    """
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if groups is None:
+        codes, names = np.zeros(len(matrix), dtype=np.intp), [None]
+    else:
+        codes, names = pd.factorize(pd.Series(groups).to_numpy(dtype=object))
+        matrix, codes = matrix[codes >= 0], codes[codes >= 0]
+
+    # Rows grouped into blocks, and every column sorted within them: a column's ratings of
+    # a group come first in ascending order and its missing values last
+    values = matrix[np.argsort(codes, kind="stable")]
+    sizes = np.bincount(codes, minlength=len(names))
+    end = np.cumsum(sizes)
+    start = end - sizes
+    for first, last in zip(start, end):
+        values[first:last].sort(axis=0)
+    block = np.repeat(np.arange(len(names)), sizes)
+    valid = ~np.isnan(values)
+    n = _block_sums(valid, start, end).astype(np.intp)
+
+    q1, med, q3 = (_quantile(values, start, n, q) for q in (0.25, 0.5, 0.75))
+    iqr = q3 - q1
+    with np.errstate(invalid="ignore"):
+        # Whiskers reach the most extreme ratings within whis * IQR of the box, never inside it
+        below = _block_sums(values < (q1 - whis * iqr)[block], start, end).astype(np.intp)
+        within = _block_sums(values <= (q3 + whis * iqr)[block], start, end).astype(np.intp)
+        whislo = np.where(below < n, _at(values, start[:, None] + below), np.nan)
+        whislo = np.where(np.isnan(whislo) | (whislo > q1), q1, whislo)
+        whishi = np.where(within > 0, _at(values, start[:, None] + within - 1), np.nan)
+        whishi = np.where(np.isnan(whishi) | (whishi < q3), q3, whishi)
+        mean = _block_sums(np.where(valid, values, 0), start, end) / n
+        notch = 1.57 * iqr / np.sqrt(n)
+
+    summaries = {}
+    for g, name in enumerate(names):
+        stats = []
+        for j, label in enumerate(labels):
+            rated = values[start[g]:start[g] + n[g, j], j].astype(float)
+            fliers = np.unique(rated[(rated < whislo[g, j]) | (rated > whishi[g, j])])
+            stats.append({"label": label, "mean": mean[g, j], "iqr": iqr[g, j], "cilo": med[g, j] - notch[g, j],
+                          "cihi": med[g, j] + notch[g, j], "whishi": whishi[g, j], "whislo": whislo[g, j],
+                          "fliers": fliers, "q1": q1[g, j], "med": med[g, j], "q3": q3[g, j]})
+        summaries[name] = stats
+    return summaries[None] if groups is None else summaries
@@ -0,0 +1,185 @@
+import hashlib
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from multiselect import OPTIONS, decode
+from survey_data import load_aggregate, read_chunks
+
+
+# Categorical dimensions the demographic breakdowns and chi-square tests slice by
+DIMENSIONS = ["Seniority", "YearsOfExperience", "CompanySize", "Role", "UsedAI", "LikelihoodUseAI"]
+
+# Part of the names of stored cubes (see survey_cube()); bump it when build_cube() changes
+CUBE_VERSION = 1
+
+# Values of the satisfaction ratings; rating_counts has one more slot for missing ratings
+RATING_SCALE = [1, 2, 3, 4, 5]
+
+# counts[i_1, ..., i_d] is the number of respondents in that combination of levels;
+# option_counts[i_1, ..., i_d, j] how many of them selected option j, and
+# rating_counts[i_1, ..., i_d, j, v] how many gave rated[j] the v-th rating of RATING_SCALE.
+# The last level of every dimension holds missing answers and is left out of the tables.
+# All of them are plain counts, so the cubes of separate shards or waves add up (merge_cubes()).
+Cube = namedtuple("Cube", ["dimensions", "levels", "counts", "options", "option_counts", "rated", "rating_counts"])
+
+
+def build_cube(df, indicators=None, dimensions=DIMENSIONS, ratings=()):
+    """
+    Counts respondents over every combination of the categorical dimensions, the selections
+    of each multi-select option (an optional indicator frame from multiselect) and the
+    ratings of each column in ratings (1-5 satisfaction scores) within them.
+    One pass over the rows; every table afterwards is a sum over axes.
+    """
+    levels, codes = [], []
+    for dim in dimensions:
+        if isinstance(df[dim].dtype, pd.CategoricalDtype):
+            # Typed columns (schema.py) have fixed level sets: every answer option is a level,
+            # in the questionnaire's order, so cubes of any rows line up
+            dim_codes, dim_levels = df[dim].cat.codes.to_numpy(), pd.Index(df[dim].cat.categories)
+        else:
+            dim_codes, dim_levels = pd.factorize(df[dim], sort=True)
+        codes.append(np.where(dim_codes < 0, len(dim_levels), dim_codes))
+        levels.append(dim_levels)
+    shape = tuple(len(lv) + 1 for lv in levels)
+    # Without dimensions every respondent falls in the one cell of a 0-d cube
+    cell = np.ravel_multi_index(codes, shape) if codes else np.zeros(len(df), dtype=np.intp)
+    size = int(np.prod(shape))
+
+    counts = np.bincount(cell, minlength=size).reshape(shape)
+    if indicators is None:
+        indicators = pd.DataFrame(index=df.index)
+    selected = indicators.loc[df.index].to_numpy(dtype=float)
+    option_counts = np.zeros((size, selected.shape[1]), dtype=np.int64)
+    for j in range(selected.shape[1]):
+        option_counts[:, j] = np.bincount(cell, weights=selected[:, j], minlength=size)
+    option_counts = option_counts.reshape(shape + (selected.shape[1],))
+
+    # Rating v of column j goes to slot v - 1, a missing rating to the last slot
+    scale = len(RATING_SCALE)
+    rating_counts = np.zeros((size, len(ratings), scale + 1), dtype=np.int64)
+    for j, column in enumerate(ratings):
+        values = df[column].to_numpy(dtype=float)
+        if not np.isin(values[~np.isnan(values)], RATING_SCALE).all():
+            raise ValueError(f"Ratings of '{column}' outside {RATING_SCALE}")
+        slot = np.where(np.isnan(values), scale, np.nan_to_num(values) - RATING_SCALE[0]).astype(np.intp)
+        rating_counts[:, j] = np.bincount(cell * (scale + 1) + slot, minlength=size * (scale + 1)).reshape(size, scale + 1)
+    rating_counts = rating_counts.reshape(shape + (len(ratings), scale + 1))
+    return Cube(list(dimensions), dict(zip(dimensions, levels)), counts,
+                list(indicators.columns), option_counts, list(ratings), rating_counts)
+
+
+def _marginal(cube, array, keep):
+    # Sums every dimension not in keep (in cube order) and drops the missing-answer levels
+    axes = tuple(i for i, dim in enumerate(cube.dimensions) if dim not in keep)
+    array = array.sum(axis=axes)
+    kept = [dim for dim in cube.dimensions if dim in keep]
+    return array[tuple(slice(0, len(cube.levels[dim])) for dim in kept)], kept
+
+
+def table(cube, row, col=None):
+    """
+    Counts by one dimension (a Series), or a two-way table (a DataFrame, like pd.crosstab).
+    row/col are dimensions; col may also be a multi-select option, giving False/True columns.
+    """
+    if col is None:
+        counts, _ = _marginal(cube, cube.counts, [row])
+        return pd.Series(counts, index=cube.levels[row], name="count")
+
+    if col in cube.options:
+        totals, _ = _marginal(cube, cube.counts, [row])
+        used, _ = _marginal(cube, cube.option_counts[..., cube.options.index(col)], [row])
+        return pd.DataFrame({False: totals - used, True: used}, index=cube.levels[row])
+
+    counts, kept = _marginal(cube, cube.counts, [row, col])
+    if kept[0] != row:
+        counts = counts.T
+    return pd.DataFrame(counts, index=cube.levels[row], columns=cube.levels[col])
+
+
+def option_table(cube, row):
+    """Respondents selecting each multi-select option, by the levels of one dimension."""
+    counts, _ = _marginal(cube, cube.option_counts, [row])
+    return pd.DataFrame(counts, index=cube.levels[row], columns=cube.options)
+
+
+def rating_table(cube, row, column):
+    """
+    Ratings of one rated column by the levels of a dimension (levels x RATING_SCALE counts),
+    the group x value table a Kruskal-Wallis test needs. Missing ratings are left out.
+    """
+    counts, _ = _marginal(cube, cube.rating_counts[..., cube.rated.index(column), :len(RATING_SCALE)], [row])
+    return pd.DataFrame(counts, index=cube.levels[row], columns=RATING_SCALE)
+
+
+def option_totals(cube):
+    """Respondents selecting each multi-select option, in all (including missing-answer) levels."""
+    return pd.Series(cube.option_counts.reshape(-1, len(cube.options)).sum(axis=0), index=cube.options)
+
+
+def merge_cubes(a, b):
+    """
+    Adds two cubes over the same dimensions and options, e.g. the cube of the rows already
+    ingested and that of the rows ingested since (survey_data.ingest()). Levels are aligned;
+    a level seen in only one of them counts zero in the other.
+    """
+    if a.dimensions != b.dimensions or a.options != b.options or a.rated != b.rated:
+        raise ValueError("Only cubes over the same dimensions, options and rated columns can be merged")
+    if all(a.levels[dim].equals(b.levels[dim]) for dim in a.dimensions):
+        return a._replace(counts=a.counts + b.counts, option_counts=a.option_counts + b.option_counts,
+                          rating_counts=a.rating_counts + b.rating_counts)
+    levels, index_a, index_b = [], [], []
+    for dim in a.dimensions:
+        merged = a.levels[dim].union(b.levels[dim])
+        levels.append(merged)
+        # Position of each cube's levels in the merged ones, the missing-answer level last
+        index_a.append(np.append(merged.get_indexer(a.levels[dim]), len(merged)))
+        index_b.append(np.append(merged.get_indexer(b.levels[dim]), len(merged)))
+    shape = tuple(len(lv) + 1 for lv in levels)
+    options = np.arange(len(a.options))
+    rated, slots = np.arange(len(a.rated)), np.arange(len(RATING_SCALE) + 1)
+
+    counts = np.zeros(shape, dtype=np.int64)
+    option_counts = np.zeros(shape + (len(options),), dtype=np.int64)
+    rating_counts = np.zeros(shape + (len(rated), len(slots)), dtype=np.int64)
+    for cube, index in [(a, index_a), (b, index_b)]:
+        counts[np.ix_(*index)] += cube.counts
+        option_counts[np.ix_(*index, options)] += cube.option_counts
+        rating_counts[np.ix_(*index, rated, slots)] += cube.rating_counts
+    return Cube(list(a.dimensions), dict(zip(a.dimensions, levels)), counts, list(a.options), option_counts,
+                list(a.rated), rating_counts)
+
+
+def stream_cube(path=None, dimensions=DIMENSIONS, multiselect="PrioritizationMethodsUsed", ratings=(),
+                chunk_rows=100_000):
+    """
+    The cube of a CSV export too large to load: the export is read in chunks of chunk_rows
+    rows (only the columns the cube needs, see survey_data.read_chunks()) and the cube of each
+    chunk is merged into the total, so peak memory does not grow with the export.
+    multiselect is the multi-select column whose options are counted (None for none).
+    """
+    columns = list(dimensions) + ([multiselect] if multiselect else [])
+    total = None
+    for chunk in read_chunks(path, columns, ratings, chunk_rows):
+        indicators = decode(chunk[multiselect], OPTIONS[multiselect]) if multiselect else None
+        cube = build_cube(chunk, indicators, dimensions, ratings)
+        total = cube if total is None else merge_cubes(total, cube)
+    return total
+
+
+def survey_cube(dimensions=DIMENSIONS, multiselect=None, ratings=(), path=None):
+    """
+    The cube of the survey's participants (the rows of survey_data.load_survey()), kept next
+    to the export and updated from the rows each ingest appends: build_cube() on those rows,
+    merged into the stored cube with merge_cubes() (see survey_data.load_aggregate()).
+    multiselect is the multi-select column whose options are counted (None for none).
+    """
+    def build(raw):
+        rows = raw[raw["Participated"] == "Yes"]
+        indicators = decode(rows[multiselect], OPTIONS[multiselect]) if multiselect else None
+        return build_cube(rows, indicators, dimensions, ratings)
+
+    spec = [CUBE_VERSION, list(dimensions), multiselect, OPTIONS.get(multiselect), list(ratings)]
+    name = "cube-" + hashlib.sha256(repr(spec).encode()).hexdigest()[:16]
+    return load_aggregate(name, build, merge_cubes, path)
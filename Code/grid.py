@@ -0,0 +1,39 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def cell_seeds(cells, seed=42):
+    """
+    One independent seed per grid cell, derived from a single root seed and a hash of the
+    cell itself (not its position), so a cell gets the same seed in any grid it is part of.
+    """
+    return [np.random.SeedSequence([seed, int.from_bytes(hashlib.sha256(repr(cell).encode()).digest()[:8], "little")])
+            for cell in cells]
+
+
+def run_grid(cell_func, cells, seed=42, workers=None):
+    """
+    Runs cell_func(cell, seed_sequence) for every cell of a method x demographic grid.
+
+    Every cell gets its own seed from seed and the cell (see cell_seeds()), and results
+    come back in cell order, so the output is identical whatever the number of workers.
+    cell_func must be importable by the workers (a top-level function of the calling
+    script, whose own run code sits under `if __name__ == "__main__":`).
+    workers defaults to the SURVEY_WORKERS environment variable, else all cores;
+    with one worker the cells run in-process.
+    """
+    cells = list(cells)
+    return map_cells(cell_func, cells, cell_seeds(cells, seed), workers)
+
+
+def map_cells(cell_func, cells, seeds, workers=None):
+    """Runs cell_func(cell, seed) for the given cells and seeds, as run_grid(), in cell order."""
+    if workers is None:
+        workers = int(os.environ.get("SURVEY_WORKERS", os.cpu_count() or 1))
+    if workers <= 1 or len(cells) <= 1:
+        return [cell_func(cell, s) for cell, s in zip(cells, seeds)]
+    with ProcessPoolExecutor(max_workers=min(workers, len(cells))) as pool:
+        return list(pool.map(cell_func, cells, seeds))
@@ -0,0 +1,123 @@
+"""
+Compiled versions of the innermost bootstrap kernels (counting resampled contingency tables,
+the chi-square of a stack of tables, ranks and tie correction of Kruskal-Wallis), used by
+bootstrap.py when Numba is installed. They loop over each table once instead of building
+the (B, n) temporaries of the NumPy versions.
+
+    SURVEY_BACKEND=numpy python Code/pipeline.py     # force the NumPy kernels
+    python Code/kernels.py                           # check both backends agree (tests/test_kernels.py)
+
+Without Numba the NumPy kernels in bootstrap.py run; results are the same either way.
+"""
+import os
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # optional: the NumPy kernels are used instead
+    numba = None
+
+
+BACKEND_VAR = "SURVEY_BACKEND"
+BACKENDS = ["numpy", "numba"]
+
+# The backend bootstrap.py dispatches to: Numba when installed, unless SURVEY_BACKEND=numpy
+backend = "numba" if numba is not None and os.environ.get(BACKEND_VAR) != "numpy" else "numpy"
+
+
+def set_backend(name):
+    """Switches the kernels bootstrap.py uses ("numpy" or "numba")."""
+    global backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}'; choose from {', '.join(BACKENDS)}")
+    if name == "numba" and numba is None:
+        raise ImportError("The numba backend needs Numba (pip install numba)")
+    backend = name
+
+
+if numba is not None:
+    # error_model="numpy": 0 / 0 gives NaN as in the NumPy kernels instead of raising
+    jit = numba.njit(cache=True, nogil=True, error_model="numpy")
+
+    @jit
+    def resample_counts(x, y, idx, r, c):
+        """(B, r, c) counts of the code pairs (x, y) of the rows of every resample in idx."""
+        B, n = idx.shape
+        counts = np.zeros((B, r, c), dtype=np.int64)
+        for b in range(B):
+            for j in range(n):
+                i = idx[b, j]
+                counts[b, x[i], y[i]] += 1
+        return counts
+
+    @jit
+    def chi2_tables(tables):
+        """Pearson chi-square and min_dim of a (B, r, c) stack of tables, as bootstrap.chi2_tables()."""
+        B, r, c = tables.shape
+        chi2 = np.zeros(B)
+        min_dim = np.zeros(B, dtype=np.int64)
+        rows = np.empty(r)
+        cols = np.empty(c)
+        for b in range(B):
+            rows[:] = 0.0
+            cols[:] = 0.0
+            for i in range(r):
+                for j in range(c):
+                    rows[i] += tables[b, i, j]
+                    cols[j] += tables[b, i, j]
+            n = rows.sum()
+            r_eff = (rows > 0).sum()
+            c_eff = (cols > 0).sum()
+            yates = (r_eff - 1) * (c_eff - 1) == 1
+            total = 0.0
+            for i in range(r):
+                for j in range(c):
+                    expected = rows[i] * cols[j] / n
+                    if expected > 0:
+                        diff = tables[b, i, j] - expected
+                        if yates:
+                            diff = np.sign(diff) * max(abs(diff) - 0.5, 0.0)
+                        total += diff * diff / expected
+            chi2[b] = total
+            min_dim[b] = min(r_eff, c_eff) - 1
+        return chi2, min_dim
+
+    @jit
+    def kruskal_counts(counts):
+        """Tie-corrected Kruskal-Wallis H and group count of a (B, k, u) stack, as bootstrap.kruskal_counts()."""
+        B, k, u = counts.shape
+        h = np.empty(B)
+        n_groups = np.zeros(B, dtype=np.int64)
+        midranks = np.empty(u)
+        for b in range(B):
+            n = 0.0
+            tie_terms = 0.0
+            for v in range(u):
+                ties = 0.0
+                for g in range(k):
+                    ties += counts[b, g, v]
+                # Mid-rank of value v: the ranks before it plus the middle of its ties
+                midranks[v] = n + (ties + 1) / 2
+                n += ties
+                tie_terms += ties ** 3 - ties
+            squares = 0.0
+            for g in range(k):
+                size = 0.0
+                rank_sum = 0.0
+                for v in range(u):
+                    size += counts[b, g, v]
+                    rank_sum += counts[b, g, v] * midranks[v]
+                if size > 0:
+                    n_groups[b] += 1
+                    squares += rank_sum ** 2 / size
+            value = (12 / (n * (n + 1)) * squares - 3 * (n + 1)) / (1 - tie_terms / (n ** 3 - n))
+            h[b] = value if n_groups[b] >= 2 and np.isfinite(value) else np.nan
+        return h, n_groups
+
+
+if __name__ == "__main__":
+    import pytest
+
+    print(f"Numba {numba.__version__ if numba else 'not installed'}; backend: {backend}")
+    raise SystemExit(pytest.main([os.path.join(os.path.dirname(os.path.abspath(__file__)), "tests", "test_kernels.py")]))
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from profiling import stage
+from schema import METHODS
+from survey_data import load_derived
+
+
+# Canonical answer options of the multi-select questions (the methods are those of
+# schema.py, which also rates them). Write-in answers ("Other" in the form) are all
+# folded into the OTHER column.
+ENCOURAGEMENTS = [
+    "Faster decision-making",
+    "Integration with existing tools (JIRA, Asana, etc.)",
+    "Improved accuracy in prioritization",
+    "Reduction of biases in prioritization",
+    "Positive case studies or success stories",
+    "Regulatory compliance or security assurances",
+]
+
+OTHER = "Other"
+
+# Part of the cache name of decoded matrices; bump it when decoding changes
+CODEC_VERSION = 2
+
+# Multi-select columns and their options (the *_Split columns hold the same answers as lists)
+OPTIONS = {
+    "PrioritizationMethodsUsed": METHODS,
+    "Encouragement": ENCOURAGEMENTS,
+}
+
+
+def split_options(answer):
+    """
+    Splits one multi-select answer on commas that are not inside parentheses.
+    Only an opened "(" protects commas, so a stray ")" in a write-in such as
+    "Gut feeling :)" does not glue the options before it together.
+    """
+    items, depth, start = [], 0, 0
+    for i, char in enumerate(answer):
+        if char == "(":
+            depth += 1
+        elif char == ")" and depth > 0:
+            depth -= 1
+        elif char == "," and depth == 0:
+            items.append(answer[start:i])
+            start = i + 1
+    items.append(answer[start:])
+    return [item.strip() for item in items if item.strip()]
+
+
+def decode(series, options):
+    """
+    Decodes a multi-select column into a respondent x option boolean matrix
+    (options in registry order, then OTHER). Each distinct answer string is parsed
+    only once; missing answers give all-False rows.
+    """
+    with stage("decode", rows=len(series), column=series.name):
+        codes, answers = pd.factorize(series)
+        columns = {option: j for j, option in enumerate(options)}
+        parsed = np.zeros((len(answers) + 1, len(options) + 1), dtype=bool)
+        for i, answer in enumerate(answers):
+            for item in split_options(answer):
+                parsed[i, columns.get(item, len(options))] = True
+        # code -1 (missing) picks the all-False last row
+        return pd.DataFrame(parsed[codes], index=series.index, columns=list(options) + [OTHER])
+
+
+def load_indicators(df, column="PrioritizationMethodsUsed", path=None):
+    """
+    Indicator matrix of a multi-select column for the rows of df (a frame from
+    survey_data.load_survey), decoded once per export and cached next to the data.
+    """
+    indicators = load_derived(f"{column}.indicators-v{CODEC_VERSION}", lambda raw: decode(raw[column], OPTIONS[column]), path)
+    return indicators.loc[df.index]
+
+
+# Counts and shares by group are sums of the indicator matrix within the groups, taken
+# once in the count cube (cube.build_cube(), then cube.option_table() and cube.table())
+def option_counts(indicators):
+    """Number of respondents selecting each option, most selected first."""
+    counts = pd.Series(indicators.to_numpy().sum(axis=0), index=indicators.columns)
+    return counts.sort_values(ascending=False, kind="stable")
+
@@ -0,0 +1,136 @@
+"""
+Runs the analyses (figures 01-08, appendix tables A1-A5) as one pipeline.
+
+    python Code/pipeline.py                 # everything
+    python Code/pipeline.py fig04 A1 A2     # a subset, with the inputs they need
+    python Code/pipeline.py --list
+
+The shared inputs (the survey frame and the decoded multi-select matrix) are
+loaded once; the analyses then run concurrently in worker processes forked from
+this one, which inherit them, each writing its figures to --out and its table to
+the working directory. The workers are always forked, also where Python starts
+processes by spawn or forkserver by default (macOS, Python 3.14); on Windows,
+which cannot fork, every worker reads the inputs it needs from the Parquet store.
+"""
+import argparse
+import glob
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from render import CODE_DIR, render_script
+
+
+# A pipeline node: either a shared input prepared in this process (load) or an
+# analysis script run in a worker (script), with the names of the nodes it needs.
+Node = namedtuple("Node", ["load", "script", "inputs"])
+
+
+def _load_survey():
+    from survey_data import load_survey
+    load_survey()
+
+
+def _load_methods():
+    from multiselect import load_indicators
+    from survey_data import load_survey
+    df = load_survey()
+    load_indicators(df, "PrioritizationMethodsUsed")
+    load_indicators(df, "Encouragement")
+
+
+def _script(prefix):
+    return glob.glob(os.path.join(CODE_DIR, f"{prefix} *.py"))[0]
+
+
+NODES = {
+    "survey": Node(_load_survey, None, []),
+    "methods": Node(_load_methods, None, ["survey"]),
+    "fig01": Node(None, _script("01"), ["survey"]),
+    "fig02": Node(None, _script("02"), ["survey"]),
+    "fig03": Node(None, _script("03"), ["survey", "methods"]),
+    "fig04": Node(None, _script("04"), ["survey", "methods"]),
+    "fig05": Node(None, _script("05"), ["survey", "methods"]),
+    "fig06": Node(None, _script("06"), ["survey"]),
+    "fig07": Node(None, _script("07"), ["survey"]),
+    "fig08": Node(None, _script("08"), ["survey"]),
+    "A1": Node(None, _script("09"), ["survey", "methods"]),
+    "A2": Node(None, _script("10-1"), ["survey"]),
+    "A3": Node(None, _script("10-2"), ["survey"]),
+    "A4": Node(None, _script("11"), ["survey"]),
+    "A5": Node(None, _script("12"), ["survey", "methods"]),
+}
+
+ANALYSES = [name for name, node in NODES.items() if node.script]
+
+
+def resolve(names):
+    """The selected nodes plus everything they depend on, in dependency order."""
+    order = []
+
+    def visit(name):
+        if name not in NODES:
+            raise KeyError(f"Unknown pipeline node '{name}'; choose from {', '.join(NODES)}")
+        for dep in NODES[name].inputs:
+            visit(dep)
+        if name not in order:
+            order.append(name)
+
+    for name in names:
+        visit(name)
+    return order
+
+
+def _run_analysis(name, out_dir, formats, nested_workers):
+    if nested_workers is not None:
+        os.environ["SURVEY_WORKERS"] = str(nested_workers)
+    render_script(NODES[name].script, out_dir, formats)
+    return name
+
+
+def _fork_context():
+    # Forked workers inherit the inputs loaded in this process; spawned ones would start empty
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def run_pipeline(names=None, out_dir="figures", formats=("png",), workers=None):
+    """
+    Runs the selected analyses (all by default). Inputs are prepared in dependency
+    order in this process; analyses, which only depend on inputs, run concurrently.
+    Returns the names of the analyses run.
+    """
+    order = resolve(names or ANALYSES)
+    for name in order:
+        if NODES[name].load:
+            NODES[name].load()
+
+    analyses = [name for name in order if NODES[name].script]
+    if workers is None:
+        workers = int(os.environ.get("SURVEY_WORKERS", os.cpu_count() or 1))
+    if workers <= 1 or len(analyses) <= 1:
+        return [_run_analysis(name, out_dir, formats, None) for name in analyses]
+    # The analyses already use every worker, so their own bootstrap grids run serially
+    with ProcessPoolExecutor(max_workers=min(workers, len(analyses)), mp_context=_fork_context()) as pool:
+        n = len(analyses)
+        return list(pool.map(_run_analysis, analyses, [out_dir] * n, [formats] * n, [1] * n))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the survey analyses as one pipeline.")
+    parser.add_argument("names", nargs="*", help="analyses to run (default: all)")
+    parser.add_argument("--out", default="figures", help="figure output directory (default: figures)")
+    parser.add_argument("--formats", nargs="+", default=["png"], choices=["png", "svg", "pdf"])
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--list", action="store_true", help="list the pipeline nodes and exit")
+    args = parser.parse_args()
+
+    if args.list:
+        for name, node in NODES.items():
+            target = os.path.basename(node.script) if node.script else "(shared input)"
+            print(f"{name:8} {target}  <- {', '.join(node.inputs) or '-'}")
+    else:
+        for name in run_pipeline(args.names, args.out, tuple(args.formats), args.workers):
+            print(f"Done {name}")
@@ -0,0 +1,96 @@
+"""
+Post-hoc comparisons after significant Kruskal-Wallis tests: Dunn's z-test of every pair of
+groups, from the same rank sums as H (bootstrap.rank_sums()), with the p-values of a whole
+method x demographic grid corrected for multiple comparisons at once.
+"""
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from bootstrap import rank_sums
+
+
+CORRECTIONS = ["holm", "bh"]
+
+
+def dunn_counts(counts):
+    """
+    Dunn's z of every pair of groups i < j in a (B, k, u) stack of group x value count tables
+    (values ascending), tie-corrected: (B, k * (k - 1) / 2) z values in np.triu_indices(k, 1)
+    order, positive where group i ranks higher. NaN where either group is empty.
+    """
+    sums, sizes, ties = rank_sums(counts)
+    n = ties.sum(axis=1)
+    first, second = np.triu_indices(sizes.shape[1], 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_ranks = sums / sizes
+        variance = n * (n + 1) / 12 - (ties ** 3 - ties).sum(axis=1) / (12 * (n - 1))
+        z = ((mean_ranks[:, first] - mean_ranks[:, second])
+             / np.sqrt(variance[:, None] * (1 / sizes[:, first] + 1 / sizes[:, second])))
+    z[~np.isfinite(z)] = np.nan
+    return z
+
+
+def adjust_pvalues(p, method="holm"):
+    """
+    p-values corrected for testing them all: Holm's step-down family-wise correction or
+    Benjamini-Hochberg's false discovery rate ("bh"). NaNs are not tests and stay NaN.
+    """
+    if method not in CORRECTIONS:
+        raise ValueError(f"Unknown correction '{method}'; choose from {', '.join(CORRECTIONS)}")
+    p = np.asarray(p, dtype=float)
+    tested = np.flatnonzero(~np.isnan(p))
+    m = len(tested)
+    order = tested[np.argsort(p[tested], kind="stable")]
+    ranked = p[order]
+    if method == "holm":
+        ranked = np.maximum.accumulate(ranked * (m - np.arange(m)))
+    else:
+        ranked = np.minimum.accumulate((ranked * m / np.arange(1, m + 1))[::-1])[::-1]
+    adjusted = np.full(p.shape, np.nan)
+    adjusted[order] = np.minimum(ranked, 1)
+    return adjusted
+
+
+def dunn_grid(histograms, method="holm", cell_columns=()):
+    """
+    Dunn's test of every pair of groups in every cell of a grid, given as {cell: groups x
+    values count table} (e.g. cube.rating_table() of the significant cells). The tables are
+    stacked and tested in one batch, and the p-values of all pairs of all cells corrected
+    together. Returns one row per pair: cell, Group A, Group B, z, p, p_adj (A ranks higher
+    where z > 0); tuple cells are also spread over cell_columns, put first.
+    """
+    columns = ["cell", "Group A", "Group B", "z", "p", "p_adj"]
+    if not histograms:
+        return pd.DataFrame(columns=list(cell_columns) + columns)
+    tables = {cell: pd.DataFrame(table) for cell, table in histograms.items()}
+    values = sorted(set().union(*(table.columns for table in tables.values())))
+    k = max(len(table) for table in tables.values())
+    counts = np.zeros((len(tables), k, len(values)))
+    for b, table in enumerate(tables.values()):
+        counts[b, :len(table)] = table.reindex(columns=values, fill_value=0).to_numpy()
+
+    z = dunn_counts(counts)
+    p = 2 * stats.norm.sf(np.abs(z))
+    p_adj = adjust_pvalues(p.ravel(), method).reshape(p.shape)
+
+    first, second = np.triu_indices(k, 1)
+    rows = []
+    for b, (cell, table) in enumerate(tables.items()):
+        for pair, (i, j) in enumerate(zip(first, second)):
+            if not np.isnan(z[b, pair]):
+                rows.append((cell, table.index[i], table.index[j], z[b, pair], p[b, pair], p_adj[b, pair]))
+    pairs = pd.DataFrame(rows, columns=columns)
+    if cell_columns:
+        keys = pd.DataFrame(pairs["cell"].tolist(), columns=list(cell_columns), index=pairs.index)
+        pairs = pd.concat([keys, pairs], axis=1)
+    return pairs
+
+
+def pairs_finding(pairs, cell, alpha=0.05):
+    """The pairs of one cell of dunn_grid() that differ after correction, as 'A > B (p=...)' text."""
+    differ = pairs[(pairs["cell"] == cell) & (pairs["p_adj"] < alpha)]
+    if differ.empty:
+        return "No pair differs"
+    return "; ".join(f"{a} {'>' if z > 0 else '<'} {b} (p={p:.3f})"
+                     for a, b, z, p in zip(differ["Group A"], differ["Group B"], differ["z"], differ["p_adj"]))
@@ -0,0 +1,118 @@
+"""
+Opt-in timing of the analysis stages (loading, multi-select decoding, bootstraps, figures).
+
+    SURVEY_PROFILE=profile.jsonl python Code/pipeline.py
+    python Code/profiling.py profile.jsonl          # per-stage summary
+
+With SURVEY_PROFILE set, every stage appends one JSON record to that file: wall and
+CPU seconds, the process's peak RSS, and rows / resamples (per second) where they
+apply. SURVEY_PROFILE_DUMP=<dir> additionally writes a profile of each stage there,
+with cProfile (.prof) or, if SURVEY_PROFILER=pyinstrument and it is installed, as
+pyinstrument HTML; nested stages are part of the enclosing stage's profile.
+Without SURVEY_PROFILE the stages cost a dictionary lookup.
+"""
+import cProfile
+import json
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+
+PROFILE_VAR = "SURVEY_PROFILE"
+DUMP_VAR = "SURVEY_PROFILE_DUMP"
+PROFILER_VAR = "SURVEY_PROFILER"
+
+# Only the outermost stage is profiled (nested stages show up inside its dump);
+# Python does not allow two profilers to be active at once.
+_profiling = False
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process so far, in MB (None where unknown)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # bytes on macOS, kilobytes on Linux
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+def _start_profiler():
+    global _profiling
+    _profiling = True
+    if os.environ.get(PROFILER_VAR) == "pyinstrument":
+        try:
+            import pyinstrument
+            profiler = pyinstrument.Profiler()
+            profiler.start()
+            return profiler
+        except ImportError:
+            pass
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def _dump_profiler(profiler, name, dump_dir):
+    global _profiling
+    _profiling = False
+    os.makedirs(dump_dir, exist_ok=True)
+    base = os.path.join(dump_dir, f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', name)}-{os.getpid()}-{time.time_ns()}")
+    if isinstance(profiler, cProfile.Profile):
+        profiler.disable()
+        profiler.dump_stats(base + ".prof")
+    else:
+        profiler.stop()
+        with open(base + ".html", "w") as f:
+            f.write(profiler.output_html())
+
+
+@contextmanager
+def stage(name, rows=None, resamples=None, **fields):
+    """
+    Times a stage when profiling is on. Yields a dict the caller may add fields to
+    (e.g. rows once they are known); it is written out as one JSON line on exit.
+    """
+    path = os.environ.get(PROFILE_VAR)
+    record = {"stage": name, "rows": rows, "resamples": resamples, **fields}
+    if not path:
+        yield record
+        return
+
+    dump_dir = os.environ.get(DUMP_VAR)
+    profiler = _start_profiler() if dump_dir and not _profiling else None
+    wall, cpu = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    finally:
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        if profiler is not None:
+            _dump_profiler(profiler, name, dump_dir)
+        record.update(wall_s=wall, cpu_s=cpu, peak_rss_mb=peak_rss_mb(), pid=os.getpid(),
+                      script=os.path.basename(getattr(sys.modules.get("__main__"), "__file__", "") or ""))
+        if record.get("resamples") and wall > 0:
+            record["resamples_per_s"] = record["resamples"] / wall
+        # One short append per record, so concurrent workers can share the file
+        with open(path, "a") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+
+def summarize(path):
+    """Per-stage totals of a profile file: calls, wall and CPU seconds, max peak RSS."""
+    import pandas as pd
+
+    records = pd.read_json(path, lines=True)
+    return records.groupby("stage").agg(
+        calls=("stage", "size"), wall_s=("wall_s", "sum"), cpu_s=("cpu_s", "sum"),
+        peak_rss_mb=("peak_rss_mb", "max"), rows=("rows", "sum"), resamples=("resamples", "sum"),
+    ).sort_values("wall_s", ascending=False)
+
+
+if __name__ == "__main__":
+    print(summarize(sys.argv[1]).to_string())
@@ -0,0 +1,156 @@
+"""
+Headless rendering of the charts (scripts 01-08).
+
+    python Code/render.py --out figures --formats png svg --workers 4
+
+Every figure is written to the output directory as <name>.<format> instead of
+being shown, and each script runs in its own worker process on the Agg backend.
+Figures whose plotted data and parameters did not change since the last render
+are skipped (see is_rendered()).
+"""
+import argparse
+import glob
+import hashlib
+import os
+import runpy
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from profiling import stage
+
+
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+FIGURE_SCRIPTS = sorted(glob.glob(os.path.join(CODE_DIR, "0[1-8] *.py")))
+
+# Render mode is passed to the scripts (and worker processes) through the environment
+FIGURE_DIR_VAR = "SURVEY_FIGURE_DIR"
+FIGURE_FORMATS_VAR = "SURVEY_FIGURE_FORMATS"
+
+# Keys of the figures checked by is_rendered() and not yet saved, by figure name
+_pending_keys = {}
+
+
+def _figure_formats():
+    return os.environ.get(FIGURE_FORMATS_VAR, "png").split(",")
+
+
+def update_hash(h, value):
+    """
+    Feeds a value into a hashlib hash: pandas objects by content and labels, arrays by
+    bytes, containers element by element, anything else by repr().
+    """
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        h.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        h.update(repr(list(value.columns) if isinstance(value, pd.DataFrame) else value.name).encode())
+    elif isinstance(value, np.ndarray):
+        h.update(repr((value.dtype.str, value.shape)).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        for key in sorted(value, key=repr):
+            h.update(repr(key).encode())
+            update_hash(h, value[key])
+    elif isinstance(value, (list, tuple)):
+        h.update(f"{type(value).__name__}{len(value)}".encode())
+        for item in value:
+            update_hash(h, item)
+    else:
+        h.update(repr(value).encode())
+
+
+def figure_key(data, **params):
+    """
+    Content hash of a figure: the aggregate it plots, its plotting parameters and the
+    source of the script drawing it (so style changes re-render too).
+    """
+    h = hashlib.sha256()
+    update_hash(h, data)
+    update_hash(h, params)
+    script = getattr(sys.modules.get("__main__"), "__file__", None)
+    if script and os.path.exists(script):
+        with open(script, "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def is_rendered(name, data, **params):
+    """
+    In render mode, True when <name> was already rendered in every requested format from
+    the same data and parameters, so the caller can skip drawing it. Otherwise the key is
+    remembered and recorded by show_figure() once the figure is saved.
+    Always False outside render mode.
+    """
+    out_dir = os.environ.get(FIGURE_DIR_VAR)
+    if not out_dir:
+        return False
+    key = figure_key(data, **params)
+    key_path = os.path.join(out_dir, ".keys", f"{name}.key")
+    files_exist = all(os.path.exists(os.path.join(out_dir, f"{name}.{fmt}")) for fmt in _figure_formats())
+    if files_exist and os.path.exists(key_path):
+        with open(key_path) as f:
+            if f.read() == key:
+                return True
+    _pending_keys[name] = key
+    return False
+
+
+def show_figure(name, fig=None):
+    """
+    Shows the current figure, or in render mode saves it as <name>.<format> for every
+    requested format and closes it, so memory does not grow with the number of charts.
+    """
+    import matplotlib.pyplot as plt
+
+    out_dir = os.environ.get(FIGURE_DIR_VAR)
+    if not out_dir:
+        plt.show()
+        return
+    fig = fig or plt.gcf()
+    os.makedirs(out_dir, exist_ok=True)
+    with stage("render", figure=name):
+        for fmt in _figure_formats():
+            fig.savefig(os.path.join(out_dir, f"{name}.{fmt}"), bbox_inches="tight")
+        plt.close(fig)
+
+    # One key file per figure, so concurrent workers never write the same file
+    if name in _pending_keys:
+        os.makedirs(os.path.join(out_dir, ".keys"), exist_ok=True)
+        with open(os.path.join(out_dir, ".keys", f"{name}.key"), "w") as f:
+            f.write(_pending_keys.pop(name))
+
+
+def render_script(path, out_dir, formats=("png",)):
+    """Runs one chart script in render mode on the Agg backend."""
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+
+    os.environ[FIGURE_DIR_VAR] = os.path.abspath(out_dir)
+    os.environ[FIGURE_FORMATS_VAR] = ",".join(formats)
+    with stage("script", script_path=os.path.basename(path)):
+        runpy.run_path(path, run_name="__main__")
+    return os.path.basename(path)
+
+
+def render_figures(out_dir, formats=("png",), scripts=None, workers=None):
+    """Renders the chart scripts (all of 01-08 by default) concurrently in a process pool."""
+    scripts = FIGURE_SCRIPTS if scripts is None else scripts
+    if workers is None:
+        workers = int(os.environ.get("SURVEY_WORKERS", os.cpu_count() or 1))
+    if workers <= 1:
+        return [render_script(path, out_dir, formats) for path in scripts]
+    with ProcessPoolExecutor(max_workers=min(workers, len(scripts))) as pool:
+        return list(pool.map(render_script, scripts, [out_dir] * len(scripts), [formats] * len(scripts)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render the survey charts to files without a display.")
+    parser.add_argument("--out", default="figures", help="output directory (default: figures)")
+    parser.add_argument("--formats", nargs="+", default=["png"], choices=["png", "svg", "pdf"])
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("scripts", nargs="*", help="chart scripts to render (default: 01-08)")
+    args = parser.parse_args()
+
+    for name in render_figures(args.out, tuple(args.formats), args.scripts or None, args.workers):
+        print(f"Rendered {name}")
@@ -0,0 +1,140 @@
+"""
+Store of the appendix tables' cell results (test statistic, p-value, effect size and
+bootstrap CI of every method x demographic cell), so that re-running an analysis only
+recomputes the cells whose inputs or settings changed.
+
+    python Code/results.py               # stored cells per table
+    python Code/results.py --clear A1    # forget a table's cells (every table without names)
+
+The store is an SQLite file next to the survey export (.FinalResults.results.sqlite), or
+the file named by SURVEY_RESULTS; SURVEY_RESULTS=off recomputes every cell.
+"""
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+from contextlib import closing
+
+import numpy as np
+
+from grid import cell_seeds, map_cells
+from profiling import stage
+from render import update_hash
+from survey_data import find_source
+
+
+RESULTS_VAR = "SURVEY_RESULTS"
+
+# Part of every cell key; bump it when a statistic, the bootstrap or the cell seeds change
+RESULTS_VERSION = 2
+
+
+def store_path(source=None):
+    """Path of the results store (SURVEY_RESULTS, else next to the export), or None when off."""
+    path = os.environ.get(RESULTS_VAR)
+    if path == "off":
+        return None
+    if path:
+        return path
+    folder, name = os.path.split(os.path.abspath(find_source(source)))
+    return os.path.join(folder, f".{os.path.splitext(name)[0]}.results.sqlite")
+
+
+def _connect(path):
+    db = sqlite3.connect(path, timeout=60)
+    db.execute("CREATE TABLE IF NOT EXISTS cells (tbl TEXT, key TEXT, cell TEXT, row TEXT,"
+               " created TEXT DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY (tbl, key))")
+    return db
+
+
+def _plain(value):
+    # NumPy scalars in the result rows, as the Python numbers JSON can hold
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot store {type(value).__name__} in the results store")
+
+
+def _script_source(cell_func):
+    # The function of a functools.partial, whose own module is functools
+    cell_func = getattr(cell_func, "func", cell_func)
+    path = getattr(sys.modules.get(cell_func.__module__), "__file__", None)
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def cell_keys(table, cell_func, cells, seed, inputs, params):
+    """
+    Key of every cell of a grid: a hash of the inputs (the frame the analysis computes from),
+    the table, the root seed, the settings in params, the source of the script defining
+    cell_func, and the cell (which, with the root seed, fixes its seed; see grid.cell_seeds()).
+    A cell has the same key in any grid, so grids that share cells share their results.
+    """
+    base = hashlib.sha256()
+    update_hash(base, [RESULTS_VERSION, table, seed, params, inputs, _script_source(cell_func)])
+    keys = []
+    for cell in cells:
+        h = base.copy()
+        update_hash(h, cell)
+        keys.append(h.hexdigest())
+    return keys
+
+
+def cached_grid(table, cell_func, cells, seed=42, inputs=None, workers=None, **params):
+    """
+    grid.run_grid() with its cells memoized in the results store under table (e.g. "A1").
+    Cells whose key (see cell_keys(); params are the settings the cells depend on, such as
+    n_boot and ci_method) is stored are read back; only the others are computed, in parallel
+    with the seeds run_grid() would give them, and saved. Returns the cell results in cell
+    order as read from the store, so a cached run gives the same table as a fresh one.
+    """
+    cells = list(cells)
+    seeds = cell_seeds(cells, seed)
+    path = store_path()
+    if path is None:
+        return map_cells(cell_func, cells, seeds, workers)
+
+    keys = cell_keys(table, cell_func, cells, seed, inputs, params)
+    with stage("results", table=table, cells=len(cells)) as record, closing(_connect(path)) as db:
+        stored = dict(db.execute("SELECT key, row FROM cells WHERE tbl = ?", (table,)))
+        missing = [i for i, key in enumerate(keys) if key not in stored]
+        record["computed"] = len(missing)
+        if missing:
+            rows = map_cells(cell_func, [cells[i] for i in missing], [seeds[i] for i in missing], workers)
+            records = [(table, keys[i], json.dumps(cells[i], default=_plain), json.dumps(row, default=_plain))
+                       for i, row in zip(missing, rows)]
+            with db:
+                db.executemany("INSERT OR REPLACE INTO cells (tbl, key, cell, row) VALUES (?, ?, ?, ?)", records)
+            stored.update((key, row) for _, key, _, row in records)
+    return [json.loads(stored[key]) for key in keys]
+
+
+def summarize(path=None):
+    """Number of stored cells and the time of the latest one, per table."""
+    with closing(_connect(path or store_path())) as db:
+        return db.execute("SELECT tbl, COUNT(*), MAX(created) FROM cells GROUP BY tbl ORDER BY tbl").fetchall()
+
+
+def clear(tables=(), path=None):
+    """Removes the stored cells of the given tables (all of them when none are given)."""
+    with closing(_connect(path or store_path())) as db, db:
+        if tables:
+            db.executemany("DELETE FROM cells WHERE tbl = ?", [(table,) for table in tables])
+        else:
+            db.execute("DELETE FROM cells")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clear", nargs="*", metavar="TABLE", help="forget the cells of these tables (all if none)")
+    args = parser.parse_args()
+    if store_path() is None:
+        sys.exit(f"The results store is off ({RESULTS_VAR}=off)")
+    if args.clear is not None:
+        clear(args.clear)
+    print(store_path())
+    for table, count, latest in summarize():
+        print(f"{table:6} {count:5} cells  (latest {latest})")
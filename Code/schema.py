@@ -0,0 +1,67 @@
+"""
+Column types of the survey export. Single-choice answers become categoricals with the
+questionnaire's fixed answer options (ordered where the options are), and the 1-5
+satisfaction ratings nullable int8, so group-bys and masks compare small integer codes.
+"""
+import pandas as pd
+
+
+# The methods respondents could select and rate (one 1-5 rating column per method)
+METHODS = [
+    "MoSCoW (Must-have, Should-have, Could-have, Won’t-have)",
+    "RICE (Reach, Impact, Confidence, Effort)",
+    "WSJF (Weighted Shortest Job First)",
+    "Value vs. Effort Matrix",
+    "Kano Model",
+    "Eisenhower Matrix",
+    "Cost of Delay",
+    "Opportunity Scoring",
+    "Custom Formula",
+    "Critical Path",
+]
+
+SENIORITY = ["Junior", "Medior", "Senior"]
+YEARS_OF_EXPERIENCE = ["Less than 1 year", "1-3 years", "4-6 years", "7-10 years", "More than 10 years"]
+COMPANY_SIZES = ["1-10 employees", "11-50 employees", "51-200 employees", "201-1,000 employees",
+                 "1,001-10,000 employees", "More than 10,000 employees"]
+USED_AI = ["No, and I am not interested", "No, but I am open to trying it", "Yes, occasionally", "Yes, frequently"]
+LIKELIHOOD = ["Very unlikely", "Somewhat unlikely", "Neutral", "Somewhat likely", "Very likely"]
+ROLES = ["Business Analyst", "Head of Product", "Other", "Product Consultant", "Product Manager", "Product Owner"]
+
+CATEGORIES = {
+    "Role": pd.CategoricalDtype(ROLES),
+    "CompanySize": pd.CategoricalDtype(COMPANY_SIZES, ordered=True),
+    "YearsOfExperience": pd.CategoricalDtype(YEARS_OF_EXPERIENCE, ordered=True),
+    "Seniority": pd.CategoricalDtype(SENIORITY, ordered=True),
+    "Participated": pd.CategoricalDtype(["No", "Yes"]),
+    "UsedAI": pd.CategoricalDtype(USED_AI, ordered=True),
+    "LikelihoodUseAI": pd.CategoricalDtype(LIKELIHOOD, ordered=True),
+    "AIUsage": pd.CategoricalDtype(["AI User", "Non-AI User"]),
+}
+
+RATING = "Int8"
+
+
+def apply(df):
+    """
+    Casts the known columns of a survey frame to their types. An answer outside a column's
+    options raises a ValueError rather than silently becoming missing.
+    """
+    df = df.copy()
+    for column, dtype in CATEGORIES.items():
+        if column not in df.columns:
+            continue
+        values = df[column]
+        unknown = set(values.dropna().unique()) - set(dtype.categories)
+        if unknown:
+            raise ValueError(f"Unknown answers in '{column}': {sorted(map(str, unknown))}")
+        df[column] = values.astype(dtype)
+    for column in METHODS:
+        if column in df.columns:
+            df[column] = df[column].astype(RATING)
+    return df
+
+
+def ordinal(series):
+    """Ordinal codes 1..k of an ordered categorical column (e.g. LikelihoodUseAI), nullable int8."""
+    return (series.cat.codes + 1).astype(RATING).mask(series.isna())
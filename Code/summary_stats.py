@@ -0,0 +1,123 @@
+"""
+Test statistics computed from count summaries (the tables of cube.py) instead of rows.
+Summaries of separate shards or survey waves combine by addition (cube.merge_cubes()),
+and the statistics are then recomputed from the merged tables.
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from bootstrap import cramers_v_tables, kruskal_counts
+
+
+# chi2_test(): Pearson chi-square (Yates-corrected for 2 x 2) and Cramér's V
+ChiSquare = namedtuple("ChiSquare", ["chi2", "p", "dof", "v", "n"])
+
+# kruskal_test(): Kruskal-Wallis H, its two epsilon-squared effect sizes and the groups compared
+KruskalWallis = namedtuple("KruskalWallis", ["h", "p", "dof", "epsilon_squared", "epsilon_squared_unbiased", "n", "k"])
+
+
+def _nonempty(table):
+    # Rows and columns without any count are not part of the test (nor of a crosstab of the rows)
+    table = pd.DataFrame(table)
+    return table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
+
+
+def chi2_test(table):
+    """Chi-square test of independence of a contingency table, as stats.chi2_contingency, with Cramér's V."""
+    table = _nonempty(table)
+    chi2, p, dof, _ = stats.chi2_contingency(table)
+    v = cramers_v_tables(table.to_numpy()[None])[0]
+    return ChiSquare(chi2, p, dof, v, int(table.to_numpy().sum()))
+
+
+def kruskal_test(histogram):
+    """
+    Kruskal-Wallis test from a groups x values count table whose columns are the values in
+    ascending order (e.g. cube.rating_table()); exact for discrete scales such as the 1-5
+    ratings, and equal to stats.kruskal on the rows the table counts.
+    """
+    histogram = _nonempty(histogram)
+    h, k = kruskal_counts(histogram.to_numpy()[None])
+    h, k = h[0], int(k[0])
+    n = int(histogram.to_numpy().sum())
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return KruskalWallis(h, stats.chi2.sf(h, k - 1), k - 1, h / ((n ** 2 - 1) / (n + 1)),
+                             0.0 if n == k else (h - k + 1) / (n - k), n, k)
+
+
+def mean_scores(histogram):
+    """Mean value of every group of a groups x values count table (NaN for empty groups)."""
+    histogram = pd.DataFrame(histogram)
+    totals = histogram.sum(axis=1)
+    return (histogram.to_numpy() @ np.asarray(histogram.columns, dtype=float)) / totals.where(totals > 0)
+
+
+# Respondents per one-hot block of association_matrix(), so the design matrix stays small
+DESIGN_ROWS = 100_000
+
+
+def _one_hot_codes(series):
+    # Integer codes (-1 = missing) and levels of a categorical, boolean / 0-1 or other column
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), list(series.cat.categories)
+    if series.dropna().isin([0, 1]).all():
+        values = series.to_numpy(dtype=float, na_value=np.nan)
+        return np.where(np.isnan(values), -1, values).astype(int), [False, True]
+    codes, levels = pd.factorize(series, sort=True)
+    return codes, list(levels)
+
+
+def association_matrix(df, columns=None):
+    """
+    Chi-square test and Cramér's V of every pair of columns of df (categoricals or 0/1
+    indicators such as multi-select options), as chi2_test() on each pair's crosstab.
+    All pairs come from one one-hot design matrix X: X'X holds every pair's contingency
+    table, and the expected counts, chi-square and effective table sizes follow from its
+    row sums by matrix products. Respondents missing either answer are left out of a pair.
+    Returns one row per pair (a before b in column order): a, b, chi2, dof, p, v, n.
+    """
+    columns = list(df.columns if columns is None else columns)
+    codes, offsets = [], [0]
+    for column in columns:
+        column_codes, levels = _one_hot_codes(df[column])
+        codes.append(column_codes)
+        offsets.append(offsets[-1] + len(levels))
+    levels = offsets[-1]
+    variable = np.repeat(np.arange(len(columns)), np.diff(offsets))
+    member = np.eye(len(columns))[variable]
+
+    # Co-occurrence counts of all levels, accumulated over blocks of respondents
+    gram = np.zeros((levels, levels))
+    for start in range(0, len(df), DESIGN_ROWS):
+        design = np.zeros((min(DESIGN_ROWS, len(df) - start), levels))
+        for column_codes, offset in zip(codes, offsets):
+            block = column_codes[start:start + DESIGN_ROWS]
+            answered = np.flatnonzero(block >= 0)
+            design[answered, offset + block[answered]] = 1
+        gram += design.T @ design
+
+    # margins[i, b]: respondents with level i who answered column b; n[a, b]: answered both
+    margins = gram @ member
+    n = member.T @ margins
+    present = (margins > 0).astype(float)
+    rows_eff = member.T @ present
+    cols_eff = rows_eff.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = margins[:, variable] * margins[:, variable].T / n[variable][:, variable]
+        diff = gram - expected
+        yates = ((rows_eff - 1) * (cols_eff - 1) == 1)[variable][:, variable]
+        diff = np.where(yates, np.sign(diff) * np.maximum(np.abs(diff) - 0.5, 0), diff)
+        terms = np.where(expected > 0, diff ** 2 / expected, 0.0)
+        chi2 = member.T @ terms @ member
+        dof = (rows_eff - 1) * (cols_eff - 1)
+        min_dim = np.minimum(rows_eff, cols_eff) - 1
+        v = np.where(min_dim > 0, np.sqrt(chi2 / (n * min_dim)), 0.0)
+    p = np.where(dof > 0, stats.chi2.sf(chi2, np.maximum(dof, 1)), 1.0)
+
+    a, b = np.triu_indices(len(columns), 1)
+    return pd.DataFrame({"a": np.array(columns, dtype=object)[a], "b": np.array(columns, dtype=object)[b],
+                         "chi2": chi2[a, b], "dof": dof[a, b].astype(int), "p": p[a, b], "v": v[a, b],
+                         "n": n[a, b].astype(int)})
@@ -0,0 +1,452 @@
+import glob
+import hashlib
+import importlib.util
+import io
+import json
+import operator
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+import schema
+from profiling import stage
+
+# pandas reads and writes the Parquet cache through pyarrow, which is optional: without it
+# the export is parsed on every load
+HAS_PARQUET = importlib.util.find_spec("pyarrow") is not None
+
+
+# Default locations of the survey export: the working directory first (as the
+# scripts have always been run next to the data), then the repository's Data/.
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data")
+SOURCE_NAMES = ["FinalResults.xlsx", "FinalResults.csv"]
+
+# Columns read_chunks() parses as categoricals: the single-choice answers (then given
+# their schema types) and the multi-select strings, which repeat
+CATEGORICAL = list(schema.CATEGORIES) + ["PrioritizationMethodsUsed", "Encouragement"]
+
+# Parts appended by incremental ingests before a store is compacted into one file
+MAX_PARTS = 16
+
+# Layout of the Parquet store, recorded in its metadata; stores of another version are rebuilt.
+# Version 2 keeps every row's position in the export as a column, so filtered scans keep it;
+# version 3 stores the column types of schema.py; version 4 leaves out repeated rows.
+STORE_VERSION = 4
+
+# The condition of select() that load_survey() applies
+PARTICIPANTS = [("Participated", "==", "Yes")]
+
+# Operators of select() conditions (the ones pyarrow filters understand)
+OPERATORS = {"==": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le,
+             ">": operator.gt, ">=": operator.ge,
+             "in": lambda s, v: s.isin(v), "not in": lambda s, v: ~s.isin(v)}
+
+# Frames already loaded in this process, by source file (and its mtime/size) and name,
+# so analyses run in one process (see pipeline.py) share a single load.
+_loaded = {}
+
+
+def find_source(path=None):
+    """Returns the path of the survey export to load."""
+    if path is not None:
+        return path
+    for folder in [os.getcwd(), DATA_DIR]:
+        for name in SOURCE_NAMES:
+            candidate = os.path.join(folder, name)
+            if os.path.exists(candidate):
+                return os.path.normpath(candidate)
+    raise FileNotFoundError(f"None of {SOURCE_NAMES} found in the working directory or {DATA_DIR}")
+
+
+def cache_paths(source):
+    """Returns the (parquet, metadata) paths of the cache kept next to the source file."""
+    folder, name = os.path.split(os.path.abspath(source))
+    stem = os.path.splitext(name)[0]
+    return (os.path.join(folder, f".{stem}.parquet"),
+            os.path.join(folder, f".{stem}.cache.json"))
+
+
+def file_hash(path):
+    """SHA-256 of a file, read in 1 MB blocks."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def read_source(source):
+    """Parses the raw Excel/CSV export (the slow path), with the column types of schema.py."""
+    if source.lower().endswith(".csv"):
+        return schema.apply(pd.read_csv(source, parse_dates=["Timestamp"]))
+    return schema.apply(pd.read_excel(source, sheet_name="Sheet1", engine="openpyxl"))
+
+
+def _read_meta(meta_path):
+    with open(meta_path) as f:
+        return json.load(f)
+
+
+def _write_meta(meta_path, meta):
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+
+
+def _cache_is_fresh(source, meta_path):
+    # mtime and size are checked first; the hash is only computed when they
+    # changed, so a touched but identical file does not trigger a rebuild.
+    if not os.path.exists(meta_path):
+        return False
+    meta = _read_meta(meta_path)
+    st = os.stat(source)
+    if meta.get("mtime") == st.st_mtime and meta.get("size") == st.st_size:
+        return True
+    if meta.get("sha256") == file_hash(source):
+        meta.update(mtime=st.st_mtime, size=st.st_size)
+        _write_meta(meta_path, meta)
+        return True
+    return False
+
+
+def _store_is_current(source):
+    parquet_path, meta_path = cache_paths(source)
+    return (os.path.exists(parquet_path) and os.path.exists(meta_path)
+            and _read_meta(meta_path).get("version") == STORE_VERSION and _cache_is_fresh(source, meta_path))
+
+
+def _part_path(base_path, k):
+    return base_path[:-len(".parquet")] + f".part-{k}.parquet"
+
+
+def _read_store(base_path, parts, columns=None, filters=None):
+    # A store is a base Parquet file plus the parts appended by later ingests
+    frames = [pd.read_parquet(path, columns=columns, filters=filters)
+              for path in [base_path] + [_part_path(base_path, k) for k in range(1, parts + 1)]]
+    return pd.concat(frames) if parts else frames[0]
+
+
+def _row_ids(start, stop):
+    # An explicit (not range) index is written to Parquet as a column and survives filtered reads
+    return pd.Index(np.arange(start, stop))
+
+
+def _append_part(base_path, parts, frame, whole):
+    """
+    Stores frame as the next part of the store at base_path; returns the new number of parts.
+    After MAX_PARTS parts the store is compacted: whole is written as the base and the parts removed.
+    """
+    if parts >= MAX_PARTS:
+        whole.to_parquet(base_path)
+        for k in range(1, parts + 1):
+            os.remove(_part_path(base_path, k))
+        return 0
+    frame.to_parquet(_part_path(base_path, parts + 1))
+    return parts + 1
+
+
+def _unique_rows(df, stored=None):
+    """
+    The rows of df that repeat neither an earlier row of df nor a row of stored (every
+    column equal, compared by row hash), so a response the export emits twice counts once.
+    """
+    hashes = pd.util.hash_pandas_object(df, index=False)
+    repeated = hashes.duplicated()
+    if stored is not None and len(stored):
+        repeated |= hashes.isin(pd.util.hash_pandas_object(stored, index=False))
+    return df[~repeated.to_numpy()]
+
+
+def build_cache(source):
+    """
+    Converts the export to Parquet and records its fingerprint, the number of export rows
+    read and of rows stored (repeated rows are left out, see _unique_rows()).
+    """
+    raw = read_source(source)
+    raw.index = _row_ids(0, len(raw))
+    df = _unique_rows(raw)
+    parquet_path, meta_path = cache_paths(source)
+    # Appended parts, derived frames and aggregates belong to the previous store
+    stem = parquet_path[:-len(".parquet")]
+    for path in glob.glob(stem + ".*.parquet") + glob.glob(stem + ".*.pkl"):
+        os.remove(path)
+    df.to_parquet(parquet_path)
+    st = os.stat(source)
+    sha256 = file_hash(source)
+    # built identifies this store for the aggregates kept next to it (see load_aggregate())
+    _write_meta(meta_path, {"source": os.path.basename(source), "version": STORE_VERSION, "mtime": st.st_mtime,
+                            "size": st.st_size, "sha256": sha256, "built": sha256, "read": len(raw),
+                            "rows": len(df)})
+    return df
+
+
+def _read_new_rows(source, meta, store):
+    """
+    The export's rows past those already in store, or None when the export was rewritten
+    rather than appended to. A CSV is only parsed from where the last ingest ended, once
+    the bytes before it are confirmed unchanged (their hash is the one recorded then).
+    An Excel file cannot be read from an offset; it is parsed whole and its first rows
+    compared with the store instead.
+    """
+    if not source.lower().endswith(".csv"):
+        df = read_source(source)
+        head = _unique_rows(df.iloc[:meta["read"]].astype(store.dtypes.to_dict()))
+        if not head.reset_index(drop=True).equals(store.reset_index(drop=True)):
+            return None
+        return df.iloc[meta["read"]:], file_hash(source)
+
+    h = hashlib.sha256()
+    with open(source, "rb") as f:
+        remaining, last = meta["size"], b""
+        while remaining > 0:
+            block = f.read(min(remaining, 1 << 20))
+            if not block:
+                return None
+            h.update(block)
+            remaining -= len(block)
+            last = block[-1:]
+        if h.hexdigest() != meta["sha256"] or last not in (b"\n", b""):
+            return None
+        tail = f.read()
+    h.update(tail)
+    if not tail.strip():
+        return store.iloc[:0], h.hexdigest()
+    rows = pd.read_csv(io.BytesIO(tail), header=None, names=list(store.columns), parse_dates=["Timestamp"])
+    return schema.apply(rows).astype(store.dtypes.to_dict()), h.hexdigest()
+
+
+def _refresh(source, record):
+    """
+    Brings the Parquet store up to date with the export; returns (every row, new rows).
+    The rows of a changed export past those already read are appended to the store as
+    a new part, except rows repeating a stored one (a re-exported response). They are
+    found by position (the row count and byte size recorded at the last ingest), not by
+    Timestamp, since the export is not in Timestamp order; the store then holds the same
+    rows as a rebuild would. The store is rebuilt when it is missing or the export was
+    not just appended to.
+    """
+    parquet_path, meta_path = cache_paths(source)
+    if _store_is_current(source):
+        meta = _read_meta(meta_path)
+        df = _read_store(parquet_path, meta.get("parts", 0))
+        return df, df.iloc[:0]
+
+    meta = _read_meta(meta_path) if os.path.exists(parquet_path) and os.path.exists(meta_path) else {}
+    new = None
+    if meta.get("version") == STORE_VERSION:
+        store = _read_store(parquet_path, meta.get("parts", 0))
+        new = _read_new_rows(source, meta, store)
+    if new is None:
+        record["rebuilt"] = True
+        df = build_cache(source)
+        return df, df
+
+    rows, sha256 = new
+    read = meta["read"] + len(rows)
+    rows.index = _row_ids(meta["read"], read)
+    rows = _unique_rows(rows, store)
+    df = pd.concat([store, rows]) if len(rows) else store
+    if len(rows):
+        meta["parts"] = _append_part(parquet_path, meta.get("parts", 0), rows, df)
+    st = os.stat(source)
+    meta.update(mtime=st.st_mtime, size=st.st_size, sha256=sha256, read=read, rows=len(df))
+    _write_meta(meta_path, meta)
+    record["appended"] = len(rows)
+    return df, rows
+
+
+def _read_raw(source, use_cache):
+    with stage("load", source=os.path.basename(source)) as record:
+        if not (use_cache and HAS_PARQUET):
+            df = read_source(source)
+        else:
+            df, _ = _refresh(source, record)
+        record["rows"] = len(df)
+    return df
+
+
+def _memo_key(source, name):
+    st = os.stat(source)
+    return (os.path.abspath(source), st.st_mtime, st.st_size, name)
+
+
+def load_raw(path=None, use_cache=True):
+    """Loads every row of the export, using the Parquet cache when it is up to date."""
+    source = find_source(path)
+    key = _memo_key(source, "raw" if use_cache else "raw-uncached")
+    if key not in _loaded:
+        _loaded[key] = _read_raw(source, use_cache)
+    return _loaded[key].copy()
+
+
+def _scan(source, columns, where):
+    with stage("scan", source=os.path.basename(source), columns=columns) as record:
+        if HAS_PARQUET:
+            if not _store_is_current(source):
+                load_raw(source)
+            parquet_path, meta_path = cache_paths(source)
+            df = _read_store(parquet_path, _read_meta(meta_path).get("parts", 0), columns, where or None)
+        else:
+            df = load_raw(source, use_cache=False)
+            mask = np.ones(len(df), dtype=bool)
+            for column, op, value in where or []:
+                mask &= OPERATORS[op](df[column], value).to_numpy(dtype=bool)
+            df = df.loc[mask, columns if columns is not None else df.columns]
+        record["rows"] = len(df)
+    return df
+
+
+def select(columns=None, where=PARTICIPANTS, path=None, arrays=False):
+    """
+    Reads the given columns (all by default) of the rows meeting every (column, op, value)
+    condition in where, ops being those of OPERATORS. Only these columns are read from the
+    Parquet store and the conditions are applied while scanning it, so the full frame is never
+    built. Rows keep their position in the export as index (as in load_raw(), which matches the
+    derived frames). Returns a frame, or with arrays=True a dict of NumPy arrays by column.
+    When every column of these rows is already loaded in this process (e.g. by the pipeline's
+    "survey" node), the columns are taken from that frame instead of scanning the store again.
+    """
+    source = find_source(path)
+    columns = None if columns is None else list(columns)
+    key = _memo_key(source, ("select", None if columns is None else tuple(columns), repr(where)))
+    full_key = _memo_key(source, ("select", None, repr(where)))
+    if key not in _loaded:
+        _loaded[key] = _loaded[full_key][columns] if full_key in _loaded else _scan(source, columns, where)
+    if arrays:
+        return {column: values.to_numpy() for column, values in _loaded[key].items()}
+    return _loaded[key].copy()
+
+
+def load_survey(path=None, use_cache=True, columns=None):
+    """
+    Loads the survey responses of everyone who took part in backlog prioritization
+    (Participated == "Yes"), the frame every analysis script starts from. Scripts may
+    pass the columns they use, so only those are read (see select()).
+    """
+    if use_cache:
+        return select(columns, PARTICIPANTS, path)
+    df = load_raw(path, use_cache)
+    df = df[df["Participated"] == "Yes"]
+    return df if columns is None else df[list(columns)]
+
+
+def ingest(path=None):
+    """
+    Brings the Parquet cache up to date with the export and returns the rows added since
+    the last ingest (every row when the cache is built from scratch). An export that only
+    grew is not re-read: only the rows appended since the last ingest are parsed and
+    stored, and the aggregates of load_aggregate() are updated from them alone.
+    """
+    source = find_source(path)
+    with stage("ingest", source=os.path.basename(source)) as record:
+        df, new_rows = _refresh(source, record)
+        record["rows"] = len(new_rows)
+    _loaded[_memo_key(source, "raw")] = df
+    return new_rows.copy()
+
+
+def read_chunks(path=None, columns=(), ratings=(), chunk_rows=100_000):
+    """
+    Streams the participants' rows of a CSV export in chunks of at most chunk_rows rows, for
+    exports too large to load (see cube.stream_cube()). Only the given columns and rating
+    columns are parsed, with declared dtypes (categoricals and int8 ratings, see schema.py),
+    so the long free-text answers are never held in memory unless asked for.
+    """
+    source = find_source(path)
+    if not source.lower().endswith(".csv"):
+        raise ValueError(f"Only CSV exports can be streamed, not {os.path.basename(source)}")
+    usecols = list(dict.fromkeys(["Participated", *columns, *ratings]))
+    dtype = {column: "category" for column in usecols if column in CATEGORICAL}
+    # Ratings are parsed as floats (the C parser's fast path) and narrowed afterwards
+    dtype.update({column: "float32" for column in ratings})
+    with stage("stream", source=os.path.basename(source)) as record:
+        record["rows"] = 0
+        for chunk in pd.read_csv(source, usecols=usecols, dtype=dtype, chunksize=chunk_rows):
+            record["rows"] += len(chunk)
+            yield schema.apply(chunk[chunk["Participated"] == "Yes"])
+
+
+def _read_derived(source, name, build):
+    if not HAS_PARQUET:
+        return build(read_source(source))
+    if not _store_is_current(source):
+        load_raw(source)
+    parquet_path, meta_path = cache_paths(source)
+    derived_path = parquet_path[:-len(".parquet")] + f".{name}.parquet"
+    meta = _read_meta(meta_path)
+    derived = meta.get("derived", {})
+    entry = derived.get(name) if isinstance(derived, dict) else None
+    if entry is not None and os.path.exists(derived_path):
+        frame = _read_store(derived_path, entry["parts"])
+        if entry["rows"] == meta["rows"]:
+            return frame
+        # Only the rows ingested since are built, and appended as a new part
+        raw = load_raw(source)
+        new = build(raw.iloc[entry["rows"]:])
+        frame = pd.concat([frame, new])
+        entry = {"rows": len(raw), "parts": _append_part(derived_path, entry["parts"], new, frame)}
+    else:
+        raw = load_raw(source)
+        frame = build(raw)
+        frame.to_parquet(derived_path)
+        entry = {"rows": len(raw), "parts": 0}
+    meta["derived"] = {**(derived if isinstance(derived, dict) else {}), name: entry}
+    _write_meta(meta_path, meta)
+    return frame
+
+
+def load_derived(name, build, path=None):
+    """
+    Loads a frame derived from the raw export (e.g. a decoded multi-select matrix), cached
+    as .<stem>.<name>.parquet next to the data. build(raw) creates it and must work row by
+    row: after an incremental ingest only the new rows are built and appended. It is built
+    from scratch whenever the main cache is rebuilt.
+    """
+    source = find_source(path)
+    key = _memo_key(source, name)
+    if key not in _loaded:
+        _loaded[key] = _read_derived(source, name, build)
+    return _loaded[key].copy()
+
+
+def _read_aggregate(source, name, build, merge):
+    if not HAS_PARQUET:
+        return build(read_source(source))
+    if not _store_is_current(source):
+        load_raw(source)
+    parquet_path, meta_path = cache_paths(source)
+    aggregate_path = parquet_path[:-len(".parquet")] + f".{name}.pkl"
+    meta = _read_meta(meta_path)
+    entry = None
+    if os.path.exists(aggregate_path):
+        with open(aggregate_path, "rb") as f:
+            entry = pickle.load(f)
+    if entry is not None and entry["built"] == meta["built"] and entry["rows"] == meta["rows"]:
+        return entry["value"]
+    raw = load_raw(source)
+    if entry is not None and entry["built"] == meta["built"] and entry["rows"] < len(raw):
+        # Only the rows ingested since are aggregated, and merged into the stored aggregate
+        value = merge(entry["value"], build(raw.iloc[entry["rows"]:]))
+    else:
+        value = build(raw)
+    # Written under another name first, so concurrent readers never see half a file
+    partial = f"{aggregate_path}.{os.getpid()}"
+    with open(partial, "wb") as f:
+        pickle.dump({"built": meta["built"], "rows": len(raw), "value": value}, f)
+    os.replace(partial, aggregate_path)
+    return value
+
+
+def load_aggregate(name, build, merge, path=None):
+    """
+    Loads an aggregate of the stored rows (e.g. a count cube), kept as .<stem>.<name>.pkl
+    next to the data with the number of rows it covers. build(raw) computes it from rows and
+    merge(a, b) adds two of them: after an incremental ingest only the new rows are built
+    and merged in. It is built from scratch whenever the main cache is rebuilt.
+    """
+    source = find_source(path)
+    key = _memo_key(source, ("aggregate", name))
+    if key not in _loaded:
+        _loaded[key] = _read_aggregate(source, name, build, merge)
+    return _loaded[key]
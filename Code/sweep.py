@@ -0,0 +1,208 @@
+"""
+Subgroup sweeps: the tests of tables A1-A4 rerun within every combination of subgroup
+filters (e.g. each role x AI user status), collected in one long table.
+
+    python Code/sweep.py --by Role AIUsage --tables A2 A3 --out sweep.csv
+    python Code/sweep.py --by "Role=Product Manager,Head of Product" Seniority
+
+The survey is integer-coded once (categorical codes, ratings, decoded method indicators);
+a subgroup is a row mask over those codes, and every subgroup x test cell runs in parallel
+through the results store (results.cached_grid), so repeating a sweep only computes the
+cells that are new.
+"""
+import argparse
+import itertools
+import os
+from collections import namedtuple
+from functools import lru_cache, partial
+
+import numpy as np
+import pandas as pd
+
+from bootstrap import bootstrap, cramers_v, epsilon_squared, epsilon_squared_unbiased
+from multiselect import load_indicators
+from results import cached_grid
+from schema import CATEGORIES, METHODS
+from summary_stats import chi2_test, kruskal_test
+from survey_data import find_source, load_survey
+
+
+# One test of an appendix table: kind of test, the variable tested across the groups of
+# factor, and whether the bootstrap resamples within those groups (as the table's script does)
+Test = namedtuple("Test", ["table", "kind", "variable", "factor", "stratified"])
+
+# The variable coding whether a method was selected (the method's own name is its rating)
+USED = "Uses {}"
+
+TESTS = {
+    "A1": [Test("A1", "chi2", USED.format(method), factor, False)
+           for method in METHODS for factor in ["Seniority", "CompanySize"]],
+    "A2": [Test("A2", "kruskal", method, factor, True) for method in METHODS for factor in ["Seniority", "CompanySize"]],
+    "A3": [Test("A3", "kruskal", method, factor, False) for method in METHODS for factor in ["UsedAI", "AIUsage"]],
+    "A4": [Test("A4", kind, variable, factor, True) for kind, variable in [("chi2", "UsedAI"),
+                                                                           ("kruskal_unbiased", "LikelihoodUseAI")]
+           for factor in ["Seniority", "CompanySize"]],
+}
+
+# Test statistic, effect size and its bootstrap statistic of every kind of test
+KINDS = {
+    "chi2": ("χ²", "V", cramers_v),
+    "kruskal": ("H", "ε²", epsilon_squared),
+    "kruskal_unbiased": ("H", "ε² (unbiased)", epsilon_squared_unbiased),
+}
+
+# Subgroups smaller than this are left out of a sweep
+MIN_SIZE = 10
+
+# The coded survey: integer codes of every variable (-1 where missing) and their labels
+Coded = namedtuple("Coded", ["codes", "levels"])
+
+_coded = {}
+
+
+def code_survey(path=None):
+    """The survey's categorical answers, ratings and method indicators as integer codes, once per source."""
+    if path not in _coded:
+        df = load_survey(path)
+        codes, levels = {}, {}
+        for column, dtype in CATEGORIES.items():
+            if column in df.columns:
+                codes[column] = df[column].cat.codes.to_numpy(dtype=np.intp)
+                levels[column] = list(dtype.categories)
+        for method in METHODS:
+            # Ratings 1-5 as codes 0-4, so the codes ascend with the ratings
+            codes[method] = (df[method].astype("float64").fillna(0).to_numpy() - 1).astype(np.intp)
+            levels[method] = [1, 2, 3, 4, 5]
+        used = load_indicators(df, "PrioritizationMethodsUsed")
+        for method in METHODS:
+            codes[USED.format(method)] = used[method].to_numpy(dtype=np.intp)
+            levels[USED.format(method)] = [False, True]
+        _coded[path] = Coded(codes, levels)
+    return _coded[path]
+
+
+@lru_cache(maxsize=256)
+def subgroup_rows(subgroup, path=None):
+    """Mask of the respondents in a subgroup, given as ((column, answer), ...) pairs."""
+    codes, levels = code_survey(path)
+    mask = np.ones(len(next(iter(codes.values()))), dtype=bool)
+    for column, answer in subgroup:
+        mask &= codes[column] == levels[column].index(answer)
+    return mask
+
+
+def run_cell(cell, seed, settings, path):
+    """
+    One test of an appendix table within one subgroup, given as (subgroup, test): statistic,
+    p-value, effect size and its bootstrap CI with the bootstrap settings {n_boot, method,
+    precision}. The path of the export is passed along so that workers started by spawn
+    code the same export.
+    """
+    subgroup, test = cell
+    codes, levels = code_survey(path)
+    rows = np.flatnonzero(subgroup_rows(subgroup, path) & (codes[test.factor] >= 0) & (codes[test.variable] >= 0))
+    groups, values = codes[test.factor][rows], codes[test.variable][rows]
+    counts = np.bincount(groups * len(levels[test.variable]) + values,
+                         minlength=len(levels[test.factor]) * len(levels[test.variable]))
+    counts = pd.DataFrame(counts.reshape(len(levels[test.factor]), -1), index=levels[test.factor],
+                          columns=levels[test.variable])
+    if (counts.sum(axis=1) > 0).sum() < 2:
+        return None
+
+    stat_name, effect_name, statistic = KINDS[test.kind]
+    if test.kind == "chi2":
+        stat, p, dof, effect, n = chi2_test(counts)
+    else:
+        kw = kruskal_test(counts)
+        stat, p, dof, n = kw.h, kw.p, kw.dof, kw.n
+        effect = kw.epsilon_squared if test.kind == "kruskal" else kw.epsilon_squared_unbiased
+    boot = bootstrap(statistic(groups, values), len(rows), strata=groups if test.stratified else None,
+                     rng=seed, **settings)
+    return {
+        **dict(subgroup),
+        "table": test.table,
+        "variable": test.variable,
+        "factor": test.factor,
+        "test": stat_name,
+        "statistic": stat,
+        "dof": dof,
+        "p": p,
+        "effect_size": effect_name,
+        "effect": effect,
+        "ci_low": boot.ci_low,
+        "ci_high": boot.ci_high,
+        "mc_error": boot.mc_error,
+        "resamples": boot.n_valid,
+        "n": n,
+    }
+
+
+def subgroups(filters, include_all=True, path=None):
+    """
+    Every combination of the filters {column: answers} (None for all of the column's
+    answers) as ((column, answer), ...) tuples, in column name order so that a subgroup is
+    the same cell whatever the order of the filters; with include_all, each column may also
+    be left unfiltered, so the sweep includes the marginal subgroups and the whole sample.
+    """
+    _, levels = code_survey(path)
+    options = []
+    for column, answers in filters.items():
+        answers = levels[column] if answers is None else list(answers)
+        unknown = set(answers) - set(levels[column])
+        if unknown:
+            raise ValueError(f"Unknown answers for '{column}': {sorted(map(str, unknown))}")
+        options.append(([None] if include_all else []) + [(column, answer) for answer in answers])
+    return [tuple(sorted((pair for pair in combination if pair is not None), key=lambda pair: pair[0]))
+            for combination in itertools.product(*options)]
+
+
+def sweep(filters, tables=tuple(TESTS), path=None, n_boot=1000, ci_method="percentile", ci_precision=None,
+          seed=42, min_size=MIN_SIZE, include_all=True, workers=None):
+    """
+    Runs the tests of the chosen appendix tables within every subgroup of subgroups(filters)
+    with at least min_size respondents, in parallel (see results.cached_grid). Returns one
+    row per subgroup and test: the filter columns ("All" where unfiltered), table, variable,
+    factor, test, statistic, dof, p, effect_size, effect, ci_low, ci_high, mc_error,
+    resamples and n. Tests with fewer than two groups in a subgroup are left out.
+    """
+    path = os.path.abspath(find_source(path))
+    coded = code_survey(path)
+    groups = [subgroup for subgroup in subgroups(filters, include_all, path)
+              if subgroup_rows(subgroup, path).sum() >= min_size]
+    settings = {"n_boot": n_boot, "method": ci_method, "precision": ci_precision}
+    # A cell's seed and stored result depend on the cell alone (see results.cell_keys()), so
+    # a subgroup's results are the same in any sweep and are computed once
+    cells = [(subgroup, test) for subgroup in groups for table in tables for test in TESTS[table]]
+    rows = cached_grid("sweep", partial(run_cell, settings=settings, path=path), cells, seed=seed,
+                       inputs=coded.codes, workers=workers, **settings)
+
+    columns = list(filters) + ["table", "variable", "factor", "test", "statistic", "dof", "p", "effect_size",
+                               "effect", "ci_low", "ci_high", "mc_error", "resamples", "n"]
+    long = pd.DataFrame([row for row in rows if row is not None], columns=columns)
+    long[list(filters)] = long[list(filters)].fillna("All")
+    return long
+
+
+def parse_filter(text):
+    """'Column' (all answers) or 'Column=answer,answer' as a (column, answers) pair."""
+    column, _, answers = text.partition("=")
+    return column, [answer.strip() for answer in answers.split(",")] if answers else None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--by", nargs="+", required=True, metavar="COLUMN[=ANSWERS]",
+                        help="subgroup filters, e.g. Role AIUsage or 'Role=Product Manager,Head of Product'")
+    parser.add_argument("--tables", nargs="+", choices=list(TESTS), default=list(TESTS))
+    parser.add_argument("--n-boot", type=int, default=1000)
+    parser.add_argument("--ci-method", choices=["percentile", "bca"], default="percentile")
+    parser.add_argument("--precision", type=float, default=None, help="adaptive bootstrap precision")
+    parser.add_argument("--min-size", type=int, default=MIN_SIZE, help="smallest subgroup tested")
+    parser.add_argument("--out", default="sweep.csv")
+    args = parser.parse_args()
+
+    filters = dict(map(parse_filter, args.by))
+    result = sweep(filters, args.tables, n_boot=args.n_boot, ci_method=args.ci_method,
+                   ci_precision=args.precision, min_size=args.min_size)
+    result.to_csv(args.out, index=False)
+    print(f"{len(result)} results in {result.groupby(list(filters)).ngroups} subgroups -> {args.out}")
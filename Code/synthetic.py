@@ -0,0 +1,173 @@
+"""
+Synthetic survey exports with the schema and answer distributions of Data/FinalResults.xlsx,
+for timing the analyses at sizes the real survey cannot reach (see benchmark.py).
+
+    python Code/synthetic.py 1000000 --out bench/FinalResults.csv
+
+Single-choice answers follow the real answer counts below. Seniority follows from
+YearsOfExperience and AIUsage from UsedAI as in the export, and LikelihoodUseAI is drawn
+given UsedAI. Every multi-select option is selected independently at its real rate, and a
+method is rated by everyone using it and by the real share of the others.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from multiselect import ENCOURAGEMENTS, METHODS, OTHER
+
+
+# Answer counts among the 287 participants of the real survey (20 more did not take part)
+PARTICIPANTS, NON_PARTICIPANTS = 287, 20
+
+ROLES = {"Product Manager": 161, "Other": 47, "Product Owner": 27, "Head of Product": 24,
+         "Product Consultant": 22, "Business Analyst": 6}
+COMPANY_SIZES = {"1-10 employees": 45, "11-50 employees": 47, "51-200 employees": 68,
+                 "201-1,000 employees": 48, "1,001-10,000 employees": 38, "More than 10,000 employees": 41}
+YEARS_OF_EXPERIENCE = {"Less than 1 year": 6, "1-3 years": 43, "4-6 years": 89, "7-10 years": 76,
+                       "More than 10 years": 73}
+SENIORITY = {"Less than 1 year": "Junior", "1-3 years": "Junior", "4-6 years": "Medior",
+             "7-10 years": "Senior", "More than 10 years": "Senior"}
+USED_AI = {"No, and I am not interested": 17, "No, but I am open to trying it": 182,
+           "Yes, occasionally": 67, "Yes, frequently": 21}
+AI_USAGE = {"No, and I am not interested": "Non-AI User", "No, but I am open to trying it": "Non-AI User",
+            "Yes, occasionally": "AI User", "Yes, frequently": "AI User"}
+LIKELIHOOD = ["Very unlikely", "Somewhat unlikely", "Neutral", "Somewhat likely", "Very likely"]
+LIKELIHOOD_BY_USED_AI = {"No, and I am not interested": [6, 4, 3, 4, 0],
+                         "No, but I am open to trying it": [1, 15, 46, 79, 41],
+                         "Yes, occasionally": [2, 3, 8, 32, 22],
+                         "Yes, frequently": [1, 0, 1, 7, 12]}
+
+# Respondents selecting each option (write-ins counted as OTHER)
+METHOD_SELECTIONS = dict(zip(METHODS + [OTHER], [192, 130, 39, 162, 32, 26, 37, 35, 58, 42, 28]))
+ENCOURAGEMENT_SELECTIONS = dict(zip(ENCOURAGEMENTS + [OTHER], [186, 163, 145, 141, 101, 59, 13]))
+METHOD_WRITE_INS = ["Gut feeling :)", "Stack Ranking", "ICE (Impact, Confidence, Effort)", "Common sense"]
+ENCOURAGEMENT_WRITE_INS = ["Explainability", "Not going to use it"]
+
+# Per method: respondents rating it, and how many gave each rating from 1 to 5
+RATINGS = dict(zip(METHODS, [
+    (258, [9, 18, 60, 119, 52]), (232, [5, 16, 79, 89, 43]), (180, [14, 37, 69, 41, 19]),
+    (227, [5, 10, 54, 90, 68]), (178, [13, 21, 94, 36, 14]), (163, [13, 24, 83, 30, 13]),
+    (166, [13, 24, 85, 35, 9]), (171, [9, 22, 70, 61, 9]), (177, [14, 21, 70, 43, 29]),
+    (175, [13, 25, 79, 38, 20]),
+]))
+
+START, END = pd.Timestamp("2025-01-31 14:47:35"), pd.Timestamp("2025-02-23 10:41:04")
+
+COLUMNS = (["Timestamp", "Role", "CompanySize", "YearsOfExperience", "Participated", "PrioritizationMethodsUsed"]
+           + METHODS + ["UsedAI", "LikelihoodUseAI", "Encouragement", "Seniority",
+                        "Encouragement_Split", "PrioritizationMethodsUsed_Split", "AIUsage"])
+
+
+def _draw(rng, counts, n):
+    # n answers drawn with the probabilities of a {answer: count} dict
+    labels = np.array(list(counts), dtype=object)
+    p = np.array(list(counts.values()), dtype=float)
+    return labels[rng.choice(len(labels), size=n, p=p / p.sum())]
+
+
+def _multi_select(rng, n, selections, write_ins):
+    """
+    Draws n multi-select answers; returns (answers, answer lists as in the *_Split columns,
+    selection matrix). Everyone selects at least one option. Rows are built from the distinct
+    selection patterns only, so the string work does not grow with n.
+    """
+    options = list(selections)
+    shares = np.array(list(selections.values())) / PARTICIPANTS
+    selected = rng.random((n, len(options))) < shares
+    empty = np.flatnonzero(~selected.any(axis=1))
+    selected[empty, rng.choice(len(options), size=len(empty), p=shares / shares.sum())] = True
+
+    write_in = rng.integers(0, len(write_ins), size=n) * selected[:, -1]
+    key = (selected.astype(np.int64) @ (1 << np.arange(len(options)))) * len(write_ins) + write_in
+    keys, inverse = np.unique(key, return_inverse=True)
+    answers, lists = [], []
+    for k in keys:
+        mask, w = divmod(int(k), len(write_ins))
+        items = [write_ins[w] if option == OTHER else option
+                 for j, option in enumerate(options) if mask >> j & 1]
+        answers.append(", ".join(items))
+        lists.append(str(items))
+    return np.array(answers, dtype=object)[inverse], np.array(lists, dtype=object)[inverse], selected
+
+
+def generate(n, seed=0, start=START, end=END):
+    """A synthetic export of n rows (participants and non-participants) with the real schema."""
+    rng = np.random.default_rng(seed)
+    years = _draw(rng, YEARS_OF_EXPERIENCE, n)
+    df = pd.DataFrame({
+        "Timestamp": start + np.sort(rng.random(n)) * (end - start),
+        "Role": _draw(rng, ROLES, n),
+        "CompanySize": _draw(rng, COMPANY_SIZES, n),
+        "YearsOfExperience": years,
+        "Participated": np.where(rng.random(n) < PARTICIPANTS / (PARTICIPANTS + NON_PARTICIPANTS), "Yes", "No"),
+    })
+
+    methods, method_lists, selected = _multi_select(rng, n, METHOD_SELECTIONS, METHOD_WRITE_INS)
+    df["PrioritizationMethodsUsed"] = methods
+    for j, method in enumerate(METHODS):
+        rated, counts = RATINGS[method]
+        uses = selected[:, j]
+        # Users always rate their method; the rest rate it at the share that makes up the total
+        p_others = (rated - METHOD_SELECTIONS[method]) / (PARTICIPANTS - METHOD_SELECTIONS[method])
+        is_rated = uses | (rng.random(n) < p_others)
+        ratings = rng.choice(np.arange(1.0, 6.0), size=n, p=np.array(counts) / sum(counts))
+        df[method] = np.where(is_rated, ratings, np.nan)
+
+    used_ai = _draw(rng, USED_AI, n)
+    likelihood = np.empty(n, dtype=object)
+    for answer, counts in LIKELIHOOD_BY_USED_AI.items():
+        rows = np.flatnonzero(used_ai == answer)
+        likelihood[rows] = _draw(rng, dict(zip(LIKELIHOOD, counts)), len(rows))
+    df["UsedAI"] = used_ai
+    df["LikelihoodUseAI"] = likelihood
+
+    encouragement, encouragement_lists, _ = _multi_select(rng, n, ENCOURAGEMENT_SELECTIONS, ENCOURAGEMENT_WRITE_INS)
+    df["Encouragement"] = encouragement
+    df["Seniority"] = pd.Series(years).map(SENIORITY).to_numpy()
+    df["Encouragement_Split"] = encouragement_lists
+    df["PrioritizationMethodsUsed_Split"] = method_lists
+    df["AIUsage"] = pd.Series(used_ai).map(AI_USAGE).to_numpy()
+
+    # Non-participants only answered the demographic questions
+    skipped = df["Participated"] == "No"
+    answers = COLUMNS[COLUMNS.index("PrioritizationMethodsUsed"):]
+    df.loc[skipped, [c for c in answers if c != "Seniority"]] = np.nan
+    df.loc[skipped, "Encouragement_Split"] = "['nan']"
+    return df[COLUMNS]
+
+
+def write_export(path, n, seed=0, chunk_rows=1_000_000):
+    """
+    Writes a synthetic export of n rows to path (.csv, or .xlsx up to Excel's row limit).
+    CSVs are generated and appended in chunks of chunk_rows with their own seeds and
+    consecutive time windows, so 10^7 rows never have to be in memory at once.
+    """
+    if not path.lower().endswith(".csv"):
+        if n >= 2 ** 20:
+            raise ValueError(f"{n} rows do not fit in an Excel sheet; write a .csv instead")
+        generate(n, seed).to_excel(path, sheet_name="Sheet1", index=False)
+        return path
+
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    n_chunks = max(1, -(-n // chunk_rows))
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+    bounds = pd.date_range(START, END, periods=n_chunks + 1)
+    for i in range(n_chunks):
+        rows = min(chunk_rows, n - i * chunk_rows)
+        chunk = generate(rows, seeds[i], bounds[i], bounds[i + 1])
+        chunk.to_csv(path, mode="w" if i == 0 else "a", header=i == 0, index=False)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a synthetic survey export.")
+    parser.add_argument("rows", type=int, help="number of rows (respondents)")
+    parser.add_argument("--out", default="FinalResults.csv", help="output .csv or .xlsx (default: FinalResults.csv)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"Wrote {write_export(args.out, args.rows, args.seed)}")
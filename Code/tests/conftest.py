@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The analysis modules import each other by name from Code/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,69 @@
+"""
+The batched statistics of bootstrap.py against SciPy, computed table by table: every
+table's chi-square must be the one stats.chi2_contingency gives, and the H of every
+group x value count table that of stats.kruskal on the values it counts.
+"""
+import numpy as np
+import pytest
+from scipy import stats
+
+import bootstrap
+import kernels
+
+RTOL = 1e-9
+
+
+@pytest.fixture(params=kernels.BACKENDS)
+def backend(request):
+    if request.param == "numba" and kernels.numba is None:
+        pytest.skip("Numba is not installed")
+    previous = kernels.backend
+    kernels.set_backend(request.param)
+    yield request.param
+    kernels.set_backend(previous)
+
+
+def random_tables(seed, max_rows=6, max_cols=5):
+    # A stack of sparse tables, so some rows and columns are empty and some tables are 2 x 2
+    rng = np.random.default_rng(seed)
+    r, c = rng.integers(2, max_rows + 1), rng.integers(2, max_cols + 1)
+    tables = rng.poisson(rng.uniform(0.3, 8), size=(20, r, c))
+    tables[:, 0, 0] += 1
+    return tables
+
+
+def nonempty(table):
+    return table[table.sum(axis=1) > 0][:, table.sum(axis=0) > 0]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_chi2_tables_match_chi2_contingency(backend, seed):
+    tables = random_tables(seed)
+    chi2, min_dim = bootstrap.chi2_tables(tables)
+    for table, value, dim in zip(tables, chi2, min_dim):
+        table = nonempty(table)
+        assert dim == min(table.shape) - 1
+        expected = stats.chi2_contingency(table)[0] if dim > 0 else 0.0
+        np.testing.assert_allclose(value, expected, rtol=RTOL, atol=1e-12)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_kruskal_counts_match_kruskal(backend, seed):
+    tables = random_tables(seed)
+    h, n_groups = bootstrap.kruskal_counts(tables)
+    values = np.arange(1, tables.shape[2] + 1)
+    for table, value, k in zip(tables, h, n_groups):
+        groups = [np.repeat(values, row) for row in table if row.sum() > 0]
+        assert k == len(groups)
+        if k < 2 or len(np.unique(np.concatenate(groups))) < 2:
+            assert np.isnan(value)
+        else:
+            np.testing.assert_allclose(value, stats.kruskal(*groups).statistic, rtol=RTOL)
+
+
+def test_stratified_resamples_keep_group_sizes():
+    strata = np.random.default_rng(0).integers(0, 4, 150)
+    idx = bootstrap.draw_indices(len(strata), 200, rng=1, strata=bootstrap.strata_layout(strata))
+    # Each position draws from its own stratum, so every resample has the original group sizes
+    assert (strata[idx] == np.sort(strata)).all()
+    assert (np.apply_along_axis(np.bincount, 1, strata[idx], minlength=4) == np.bincount(strata)).all()
@@ -0,0 +1,61 @@
+"""
+Count cubes add up: the merged cubes of two sets of rows equal the cube of all of them,
+with typed (schema.py) dimensions and with plain ones whose levels differ between the sets.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+import cube
+import schema
+from multiselect import OPTIONS, decode
+from synthetic import generate
+
+DIMENSIONS = ["Seniority", "CompanySize", "UsedAI"]
+RATINGS = ["Kano Model", "Critical Path"]
+
+
+def assert_same_cube(a, b):
+    assert a.dimensions == b.dimensions and a.options == b.options and a.rated == b.rated
+    for dim in a.dimensions:
+        assert list(a.levels[dim]) == list(b.levels[dim])
+    for field in ["counts", "option_counts", "rating_counts"]:
+        assert np.array_equal(getattr(a, field), getattr(b, field)), field
+
+
+def cube_of(df):
+    indicators = decode(df["PrioritizationMethodsUsed"], OPTIONS["PrioritizationMethodsUsed"])
+    return cube.build_cube(df, indicators, DIMENSIONS, RATINGS)
+
+
+@pytest.mark.parametrize("typed", [True, False])
+def test_merged_cubes_equal_cube_of_all_rows(typed):
+    df = generate(500, seed=3)
+    df = df[df["Participated"] == "Yes"].reset_index(drop=True)
+    if typed:
+        df = schema.apply(df)
+    else:
+        # Plain columns are factorized per cube: keep a level out of the first part
+        df = df.sort_values("Seniority", kind="stable").reset_index(drop=True)
+    first, second = df.iloc[:200], df.iloc[200:]
+    if not typed:
+        assert set(first["Seniority"].dropna()) != set(df["Seniority"].dropna())
+    assert_same_cube(cube.merge_cubes(cube_of(first), cube_of(second)), cube_of(df))
+
+
+def test_merging_different_cubes_fails():
+    df = schema.apply(generate(100, seed=4))
+    a = cube.build_cube(df, dimensions=["Seniority"])
+    b = cube.build_cube(df, dimensions=["CompanySize"])
+    with pytest.raises(ValueError):
+        cube.merge_cubes(a, b)
+
+
+def test_tables_of_merged_cube():
+    df = schema.apply(generate(300, seed=5))
+    df = df[df["Participated"] == "Yes"]
+    merged = cube.merge_cubes(cube_of(df.iloc[:100]), cube_of(df.iloc[100:]))
+    expected = pd.crosstab(df["Seniority"], df["UsedAI"], dropna=False)
+    table = cube.table(merged, "Seniority", "UsedAI")
+    assert list(table.index) == list(expected.index) and list(table.columns) == list(expected.columns)
+    assert np.array_equal(table.to_numpy(), expected.to_numpy())
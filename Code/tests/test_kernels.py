@@ -0,0 +1,70 @@
+"""
+The Numba kernels (kernels.py) against the NumPy ones in bootstrap.py: the counts must be
+identical, chi-square and H equal up to floating-point summation order.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("numba")
+
+import bootstrap  # noqa: E402
+import kernels  # noqa: E402
+
+# chi-square and H are sums of the same terms in a different order
+RTOL = 1e-12
+
+
+def random_case(seed):
+    # A random resample stack: 1-6 x 1-5 tables (2 x 2 included), with empty groups and ties
+    rng = np.random.default_rng(seed)
+    n, r, c = rng.integers(1, 300), rng.integers(1, 7), rng.integers(1, 6)
+    x, y = rng.integers(0, r, n), rng.integers(0, c, n)
+    idx = rng.integers(0, n, size=(rng.integers(1, 50), n))
+    return x, y, idx, r, c
+
+
+@pytest.fixture
+def numpy_backend():
+    previous = kernels.backend
+    kernels.set_backend("numpy")
+    yield
+    kernels.set_backend(previous)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_resample_counts_identical(numpy_backend, seed):
+    x, y, idx, r, c = random_case(seed)
+    counts = kernels.resample_counts(x, y, idx, r, c)
+    assert counts.dtype.kind == "i"
+    assert np.array_equal(counts, bootstrap.contingency_tables(x, y, idx, r, c))
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_chi2_tables_agree(numpy_backend, seed):
+    x, y, idx, r, c = random_case(seed)
+    tables = bootstrap.contingency_tables(x, y, idx, r, c)
+    chi2, min_dim = kernels.chi2_tables(tables.astype(float))
+    expected_chi2, expected_min_dim = bootstrap.chi2_tables(tables)
+    assert np.array_equal(min_dim, expected_min_dim)
+    np.testing.assert_allclose(chi2, expected_chi2, rtol=RTOL, atol=RTOL)
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_kruskal_counts_agree(numpy_backend, seed):
+    x, y, idx, r, c = random_case(seed)
+    tables = bootstrap.contingency_tables(x, y, idx, r, c)
+    h, n_groups = kernels.kruskal_counts(tables.astype(float))
+    expected_h, expected_n_groups = bootstrap.kruskal_counts(tables)
+    assert np.array_equal(n_groups, expected_n_groups)
+    np.testing.assert_allclose(h, expected_h, rtol=RTOL, atol=RTOL, equal_nan=True)
+
+
+@pytest.mark.parametrize("statistic", [bootstrap.cramers_v, bootstrap.epsilon_squared])
+def test_bootstrap_same_under_both_backends(numpy_backend, statistic):
+    rng = np.random.default_rng(0)
+    groups, values = rng.integers(0, 4, 200), rng.integers(1, 6, 200)
+    results = {}
+    for name in kernels.BACKENDS:
+        kernels.set_backend(name)
+        results[name] = bootstrap.bootstrap(statistic(groups, values), 200, n_boot=500, rng=1)
+    np.testing.assert_allclose(results["numpy"], results["numba"], rtol=RTOL)
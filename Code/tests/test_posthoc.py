@@ -0,0 +1,53 @@
+"""
+Dunn's test from count tables (posthoc.dunn_counts()) against the same test computed from
+ranked values, and the Holm / Benjamini-Hochberg corrections against worked examples.
+"""
+import numpy as np
+import pytest
+from scipy import stats
+
+import posthoc
+
+
+def dunn_from_values(groups):
+    # Dunn's z of every pair from the ranks of the values themselves, tie-corrected
+    values = np.concatenate(groups)
+    ranks = np.split(stats.rankdata(values), np.cumsum([len(g) for g in groups])[:-1])
+    n = len(values)
+    _, ties = np.unique(values, return_counts=True)
+    variance = n * (n + 1) / 12 - (ties ** 3 - ties).sum() / (12 * (n - 1))
+    return np.array([(ranks[i].mean() - ranks[j].mean()) / np.sqrt(variance * (1 / len(groups[i]) + 1 / len(groups[j])))
+                     for i, j in zip(*np.triu_indices(len(groups), 1))])
+
+
+def test_dunn_worked_example():
+    # Ranks 1, 2 against 3, 4: z = (1.5 - 3.5) / sqrt(4 * 5 / 12 * (1/2 + 1/2))
+    z = posthoc.dunn_counts(np.array([[[1, 1, 0, 0], [0, 0, 1, 1]]]))
+    np.testing.assert_allclose(z, [[-2 / np.sqrt(5 / 3)]])
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_dunn_counts_match_ranked_values(seed):
+    rng = np.random.default_rng(seed)
+    counts = rng.poisson(3, size=(rng.integers(2, 6), 5)) + 1
+    groups = [np.repeat(np.arange(1, 6), row) for row in counts]
+    np.testing.assert_allclose(posthoc.dunn_counts(counts[None])[0], dunn_from_values(groups), rtol=1e-12)
+
+
+def test_dunn_empty_group_is_nan():
+    z = posthoc.dunn_counts(np.array([[[2, 1, 0], [0, 0, 0], [0, 1, 3]]]))
+    # Pairs (0, 1), (0, 2), (1, 2): only groups 0 and 2 can be compared
+    assert np.isnan(z[0, [0, 2]]).all() and np.isfinite(z[0, 1])
+
+
+@pytest.mark.parametrize("method, expected", [
+    ("holm", [0.03, 0.06, 0.06, 0.02, np.nan]),
+    ("bh", [0.02, 0.04, 0.04, 0.02, np.nan]),
+])
+def test_adjust_pvalues_worked_examples(method, expected):
+    adjusted = posthoc.adjust_pvalues([0.01, 0.04, 0.03, 0.005, np.nan], method)
+    np.testing.assert_allclose(adjusted, expected, equal_nan=True)
+
+
+def test_adjust_pvalues_caps_at_one():
+    assert (posthoc.adjust_pvalues([0.4, 0.5, 0.6], "holm") == 1).all()
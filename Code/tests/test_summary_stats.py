@@ -0,0 +1,39 @@
+"""
+summary_stats.association_matrix() against stats.chi2_contingency on the crosstab of every
+pair of columns, with missing answers, 0/1 indicators and 2 x 2 (Yates-corrected) pairs.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+import summary_stats
+
+
+def random_survey(seed, n=400):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "size": pd.Categorical(rng.choice(["small", "medium", "large"], n), categories=["small", "medium", "large"]),
+        "role": rng.choice(["PM", "PO", "BA", "Other"], n, p=[0.5, 0.3, 0.15, 0.05]),
+        "uses_a": rng.random(n) < 0.4,
+        "uses_b": (rng.random(n) < 0.2).astype(int),
+    })
+    df.loc[rng.random(n) < 0.1, "size"] = np.nan
+    df.loc[rng.random(n) < 0.05, "role"] = None
+    return df
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("block_rows", [summary_stats.DESIGN_ROWS, 64])
+def test_association_matrix_matches_chi2_contingency(monkeypatch, seed, block_rows):
+    monkeypatch.setattr(summary_stats, "DESIGN_ROWS", block_rows)
+    df = random_survey(seed)
+    pairs = summary_stats.association_matrix(df)
+    assert len(pairs) == len(df.columns) * (len(df.columns) - 1) // 2
+    for a, b, chi2, dof, p, v, n in pairs.itertuples(index=False):
+        table = pd.crosstab(df[a], df[b])
+        table = table.loc[table.sum(axis=1) > 0, table.sum(axis=0) > 0]
+        expected_chi2, expected_p, expected_dof, _ = stats.chi2_contingency(table)
+        assert (dof, n) == (expected_dof, table.to_numpy().sum())
+        np.testing.assert_allclose([chi2, p], [expected_chi2, expected_p], rtol=1e-9)
+        np.testing.assert_allclose(v, np.sqrt(expected_chi2 / (n * (min(table.shape) - 1))), rtol=1e-9)